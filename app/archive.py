@@ -0,0 +1,82 @@
+# app/archive.py
+"""Compactação: move pneus vendidos/removidos e vendas antigas para o arquivo
+
+Uso: python -m app.archive [meses]
+
+Mantém tires e sales pequenas. As linhas vão para tires_archive e
+sales_archive e continuam disponíveis nos relatórios com include_archive=true.
+Compras não são arquivadas (o custo das vendas arquivadas vem delas).
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+from sqlalchemy import select, insert, delete, or_, and_, literal
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from .config import ARCHIVE_AFTER_MONTHS, ARCHIVE_INTERVAL_HOURS
+from .database import SessionLocal, get_engine
+from .models import Tire, Sale, tires_archive, sales_archive
+from .partitions import add_months
+
+def compact(months: int) -> dict:
+    """Arquiva o que ficou parado há mais de `months` meses; retorna as contagens"""
+    now = datetime.utcnow()
+    year, mon = add_months(now.year, now.month, -months)
+    cutoff = datetime(year, mon, 1)
+    
+    tires = Tire.__table__
+    sales = Sale.__table__
+    # Pneus vendidos há muito tempo ou removidos há muito tempo
+    old_tires = or_(
+        and_(tires.c.vendido == True, tires.c.data_saida < cutoff),
+        tires.c.deleted_at < cutoff
+    )
+    # Vendas desses pneus (a FK exige que saiam antes) e vendas removidas
+    old_sales = or_(
+        sales.c.tire_id.in_(select(tires.c.id).where(old_tires)),
+        sales.c.deleted_at < cutoff
+    )
+    
+    get_engine()
+    with SessionLocal() as db:
+        # Conexão Core: sem o filtro automático de linhas removidas
+        conn = db.connection()
+        try:
+            moved_sales = conn.execute(insert(sales_archive).from_select(
+                [column.name for column in sales.columns] + ["archived_at"],
+                select(*sales.columns, literal(now)).where(old_sales)
+            )).rowcount
+            conn.execute(delete(sales).where(old_sales))
+            
+            moved_tires = conn.execute(insert(tires_archive).from_select(
+                [column.name for column in tires.columns] + ["archived_at"],
+                select(*tires.columns, literal(now)).where(old_tires)
+            )).rowcount
+            conn.execute(delete(tires).where(old_tires))
+            db.commit()
+        except IntegrityError:
+            # Outro worker compactou ao mesmo tempo
+            db.rollback()
+            return {"sales": 0, "tires": 0}
+    
+    return {"sales": moved_sales, "tires": moved_tires}
+
+async def compaction_loop():
+    """Executa a compactação periodicamente (iniciado no lifespan)"""
+    while True:
+        try:
+            result = await run_in_threadpool(compact, ARCHIVE_AFTER_MONTHS)
+            if result["sales"] or result["tires"]:
+                print(f"🗄️  Arquivados: {result['sales']} vendas, {result['tires']} pneus")
+        except Exception as exc:
+            print(f"⚠️  Falha na compactação: {exc}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+
+if __name__ == "__main__":
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_MONTHS
+    if months <= 0:
+        print("Informe os meses (argumento ou ARCHIVE_AFTER_MONTHS)")
+        sys.exit(1)
+    print(compact(months))
@@ -5,17 +5,11 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-import os
-from dotenv import load_dotenv
 
-from .database import get_db
+from .config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from .database import get_db, get_engine, SessionLocal, replica_session
 from .models import User
-
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY", "seu-secret-key-mude-isso")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+from .tenancy import scope
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 security = HTTPBearer()
@@ -39,11 +33,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Pega o usuário atual baseado no token JWT"""
+def setup_keys():
+    """Valida a configuração do JWT e aquece o backend de assinatura"""
+    if SECRET_KEY == "seu-secret-key-mude-isso":
+        print("⚠️  SECRET_KEY padrão em uso: defina SECRET_KEY no ambiente")
+    # O primeiro encode/decode carrega o backend criptográfico do jose
+    token = jwt.encode({"sub": "warmup"}, SECRET_KEY, algorithm=ALGORITHM)
+    jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+def decode_user_id(credentials: HTTPAuthorizationCredentials) -> str:
+    """Valida o token JWT e retorna o id do usuário"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -57,8 +56,65 @@ def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return user_id
+
+def get_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """Id do usuário do token, sem consultar o banco (para dependências que
+    rodam antes de a sessão da requisição ser aberta)"""
+    return decode_user_id(credentials)
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Pega o usuário atual baseado no token JWT"""
+    user_id = decode_user_id(credentials)
     
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # A sessão da requisição (a mesma das rotas) só enxerga dados do usuário
+    scope(db, user.id)
+    return user
+
+def get_stream_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    """Como get_current_user, mas sem manter uma sessão aberta (conexões longas)"""
+    user_id = decode_user_id(credentials)
+    
+    get_engine()
+    with SessionLocal() as db:
+        exists = db.query(User.id).filter(User.id == user_id).first()
+    if exists is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
+
+def get_read_db(
+    current_user: User = Depends(get_current_user),
+    primary: Session = Depends(get_db)
+):
+    """Sessão de leitura (réplica, se configurada) para o usuário atual
+
+    Sem réplica disponível a própria sessão do primário é reaproveitada: a
+    requisição usa uma conexão só.
+    """
+    db = replica_session(current_user.last_write_at)
+    if db is None:
+        yield primary
+        return
+    # O usuário já foi carregado: devolve a conexão do primário ao pool
+    primary.close()
+    db = scope(db, current_user.id)
+    try:
+        yield db
+    finally:
+        db.close()
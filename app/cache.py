@@ -0,0 +1,32 @@
+# app/cache.py
+"""Cache em memória, por usuário, para agregados caros do dashboard
+
+Cada worker tem o seu. As rotas de escrita invalidam as entradas do usuário,
+e o TTL limita o tempo de dados velhos vindos de escritas em outro worker.
+"""
+import threading
+import time
+
+from .config import ANALYTICS_CACHE_TTL
+
+class UserCache:
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._data = {}  # user_id -> {nome: (expira_em, valor)}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, name: str):
+        entry = self._data.get(user_id, {}).get(name)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id: str, name: str, value):
+        with self._lock:
+            self._data.setdefault(user_id, {})[name] = (time.monotonic() + self.ttl, value)
+
+    def invalidate_user(self, user_id: str):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+user_cache = UserCache(ANALYTICS_CACHE_TTL)
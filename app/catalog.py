@@ -0,0 +1,189 @@
+# app/catalog.py
+"""Catálogo de marcas e medidas (tabelas brands e sizes)
+
+Uso: python -m app.catalog  (normaliza os pneus/compras ainda sem catálogo)
+
+Pneus e compras guardam brand_id/size_id; marca, medida e aro continuam nas
+linhas, já na forma canônica, para a API não mudar. O catálogo inteiro fica
+em memória em cada worker: validação e autocomplete não vão ao banco e só
+valores novos são inseridos, em transação própria (um id em cache nunca
+aponta para uma linha desfeita pelo rollback da requisição).
+"""
+import threading
+
+from fastapi import HTTPException
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import get_engine
+from .models import Brand, Size, Tire, Purchase, tires_archive
+
+def clean(value) -> str:
+    return " ".join(str(value or "").split())
+
+def brand_key(name: str) -> str:
+    """Chave de comparação da marca ("  pirelli " e "PIRELLI" são a mesma)"""
+    return clean(name).casefold()
+
+def normalize_size(medida, aro) -> tuple:
+    """Medida e aro canônicos: sem espaços e em maiúsculas (ex.: 205/55, R16)"""
+    return clean(medida).replace(" ", "").upper(), clean(aro).replace(" ", "").upper()
+
+class Catalog:
+    def __init__(self):
+        self._brands = {}       # chave -> (id, nome)
+        self._brand_names = {}  # id -> nome
+        self._sizes = {}        # (medida, aro) -> id
+        self._size_values = {}  # id -> (medida, aro)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """(Re)carrega o catálogo inteiro do banco"""
+        with get_engine().connect() as conn:
+            brands = conn.execute(select(Brand.id, Brand.key, Brand.name)).all()
+            sizes = conn.execute(select(Size.id, Size.medida, Size.aro)).all()
+        with self._lock:
+            self._brands = {key: (brand_id, name) for brand_id, key, name in brands}
+            self._brand_names = {brand_id: name for brand_id, _, name in brands}
+            self._sizes = {(medida, aro): size_id for size_id, medida, aro in sizes}
+            self._size_values = {size_id: (medida, aro) for size_id, medida, aro in sizes}
+            self._loaded = True
+
+    def _get_or_create(self, table, match: dict, extra: dict):
+        """Linha do catálogo com os valores de `match`, inserida se não existir"""
+        query = select(table).where(*[table.c[name] == value for name, value in match.items()])
+        with get_engine().begin() as conn:
+            row = conn.execute(query).first()
+            if row is not None:
+                return row
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(table).values(**match, **extra))
+            except IntegrityError:
+                # Outro worker inseriu o mesmo valor ao mesmo tempo
+                pass
+            return conn.execute(query).first()
+
+    def brand(self, name) -> tuple:
+        """(id, nome canônico) da marca, cadastrando-a se for nova"""
+        key = brand_key(name)
+        if not key:
+            raise HTTPException(status_code=400, detail="Marca não pode ser vazia")
+        if not self._loaded:
+            self.load()
+        cached = self._brands.get(key)
+        if cached is None:
+            row = self._get_or_create(Brand.__table__, {"key": key}, {"name": clean(name)})
+            cached = (row.id, row.name)
+            with self._lock:
+                self._brands[key] = cached
+                self._brand_names[row.id] = row.name
+        return cached
+
+    def size(self, medida, aro) -> tuple:
+        """(id, medida, aro) canônicos, cadastrando a combinação se for nova"""
+        medida, aro = normalize_size(medida, aro)
+        if not medida or not aro:
+            raise HTTPException(status_code=400, detail="Medida e aro não podem ser vazios")
+        if not self._loaded:
+            self.load()
+        size_id = self._sizes.get((medida, aro))
+        if size_id is None:
+            size_id = self._get_or_create(Size.__table__, {"medida": medida, "aro": aro}, {}).id
+            with self._lock:
+                self._sizes[(medida, aro)] = size_id
+                self._size_values[size_id] = (medida, aro)
+        return size_id, medida, aro
+
+    def brand_name(self, brand_id: int):
+        """Nome da marca pelo id (recarrega se foi criada em outro worker)"""
+        if brand_id not in self._brand_names and brand_id is not None:
+            self.load()
+        return self._brand_names.get(brand_id)
+
+    def size_values(self, size_id: int) -> tuple:
+        """(medida, aro) pelo id (recarrega se foi criada em outro worker)"""
+        if size_id not in self._size_values and size_id is not None:
+            self.load()
+        return self._size_values.get(size_id, (None, None))
+
+    def resolve(self, values: dict, current=None) -> dict:
+        """Canoniza marca/medida/aro de `values` e acrescenta brand_id/size_id
+
+        Em atualizações parciais, `current` (o pneu) completa medida ou aro.
+        """
+        resolved = dict(values)
+        if "marca" in values:
+            resolved["brand_id"], resolved["marca"] = self.brand(values["marca"])
+        if "medida" in values or "aro" in values:
+            medida = values.get("medida", getattr(current, "medida", None))
+            aro = values.get("aro", getattr(current, "aro", None))
+            resolved["size_id"], resolved["medida"], resolved["aro"] = self.size(medida, aro)
+        return resolved
+
+    def search_brands(self, query: str = "", limit: int = 20) -> list:
+        """Marcas cujo nome começa com `query` (autocomplete)"""
+        if not self._loaded:
+            self.load()
+        prefix = brand_key(query)
+        names = [name for key, (_, name) in self._brands.items() if key.startswith(prefix)]
+        return sorted(names, key=str.casefold)[:limit]
+
+    def search_sizes(self, query: str = "", limit: int = 20) -> list:
+        """Medidas (com aro) que começam com `query` (autocomplete)"""
+        if not self._loaded:
+            self.load()
+        prefix, _ = normalize_size(query, "")
+        sizes = sorted(size for size in self._sizes if size[0].startswith(prefix))
+        return [{"medida": medida, "aro": aro} for medida, aro in sizes[:limit]]
+
+    def migrate(self) -> int:
+        """Liga ao catálogo as linhas sem brand_id/size_id, deduplicando as
+        variações de grafia; retorna o número de valores distintos tratados"""
+        handled = 0
+        for table in (Tire.__table__, Purchase.__table__, tires_archive):
+            # Conexão Core: inclui as linhas removidas logicamente
+            with get_engine().connect() as conn:
+                raw_brands = conn.execute(
+                    select(table.c.marca).where(table.c.brand_id.is_(None)).distinct()
+                ).scalars().all()
+                raw_sizes = conn.execute(
+                    select(table.c.medida, table.c.aro).where(table.c.size_id.is_(None)).distinct()
+                ).all()
+            
+            # Cadastra primeiro (transações próprias), depois atualiza as linhas
+            brands = {raw: self.brand(raw) for raw in raw_brands if brand_key(raw)}
+            sizes = {
+                (medida, aro): self.size(medida, aro)
+                for medida, aro in raw_sizes
+                if all(normalize_size(medida, aro))
+            }
+            with get_engine().begin() as conn:
+                for raw, (brand_id, name) in brands.items():
+                    conn.execute(update(table).where(
+                        table.c.brand_id.is_(None), table.c.marca == raw
+                    ).values(brand_id=brand_id, marca=name))
+                for (raw_medida, raw_aro), (size_id, medida, aro) in sizes.items():
+                    conn.execute(update(table).where(
+                        table.c.size_id.is_(None), table.c.medida == raw_medida, table.c.aro == raw_aro
+                    ).values(size_id=size_id, medida=medida, aro=aro))
+            handled += len(brands) + len(sizes)
+        return handled
+
+    def migrate_if_empty(self):
+        """Migra bancos que já tinham pneus antes do catálogo existir"""
+        with get_engine().connect() as conn:
+            has_catalog = conn.execute(select(Brand.__table__.c.id).limit(1)).first() is not None
+            has_tires = conn.execute(select(Tire.__table__.c.id).limit(1)).first() is not None
+            has_purchases = conn.execute(select(Purchase.__table__.c.id).limit(1)).first() is not None
+        if not has_catalog and (has_tires or has_purchases):
+            self.migrate()
+        self.load()
+
+catalog = Catalog()
+
+if __name__ == "__main__":
+    from .database import init_db
+    init_db()
+    print(f"Catálogo: {catalog.migrate()} valores distintos normalizados")
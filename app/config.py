@@ -0,0 +1,128 @@
+# app/config.py
+"""Configuração da aplicação lida do ambiente (.env carregado uma única vez)"""
+import os
+import tempfile
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ========== BANCO DE DADOS ==========
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+# Réplica de leitura opcional (dashboard, relatórios e listagens)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith("postgres://"):
+    DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+
+# Leituras até N segundos após uma escrita do usuário vão para o primário
+REPLICA_STALENESS_SECONDS = float(os.getenv("REPLICA_STALENESS_SECONDS", "5"))
+# Após uma falha, a réplica fica fora por N segundos antes de nova tentativa
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "10"))
+
+# Particionamento por data de sales/purchases (só PostgreSQL; no SQLite as
+# tabelas continuam simples). Vale para tabelas criadas com a opção ligada.
+DB_PARTITIONING = os.getenv("DB_PARTITIONING", "0") == "1" and (DATABASE_URL or "").startswith("postgresql")
+PARTITION_INTERVAL = os.getenv("PARTITION_INTERVAL", "month")  # month ou year
+PARTITION_START = os.getenv("PARTITION_START", "2020-01")      # YYYY-MM
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# Bancos dedicados por tenant (opcional), no formato "modulo:funcao"; a função
+# recebe o user_id e retorna a URL do banco do tenant ou None (banco principal)
+TENANT_DATABASE_ROUTER = os.getenv("TENANT_DATABASE_ROUTER")
+
+# Conexões abertas antecipadamente no startup do worker
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "1"))
+
+# Pool por worker e orçamento total de conexões do banco (todos os workers)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+
+# ========== SERVIDOR ==========
+# O número de workers é calculado no gunicorn.conf.py a partir das mesmas
+# variáveis DB_* (o master não importa o app)
+
+def schema_ready() -> bool:
+    """True quando o master do gunicorn já criou as tabelas (DB_SCHEMA_READY=1)
+
+    Lida na chamada, não no import: com preload o app é importado antes do hook
+    do master definir a variável.
+    """
+    return os.getenv("DB_SCHEMA_READY") == "1"
+
+# ========== OPERAÇÕES EM LOTE ==========
+BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", "5000"))
+# Importação CSV: linhas por INSERT/commit e erros detalhados na resposta
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+
+# ========== LIMITES DE TAXA E CONCORRÊNCIA ==========
+# Token bucket por usuário e rota: requisições/segundo e rajada máxima
+ANALYTICS_RATE = float(os.getenv("ANALYTICS_RATE", "1"))
+ANALYTICS_BURST = int(os.getenv("ANALYTICS_BURST", "10"))
+WRITE_RATE = float(os.getenv("WRITE_RATE", "10"))
+WRITE_BURST = int(os.getenv("WRITE_BURST", "50"))
+# Requisições simultâneas por worker (analytics não pode esgotar o pool do banco)
+ANALYTICS_MAX_CONCURRENCY = int(os.getenv("ANALYTICS_MAX_CONCURRENCY", "3"))
+TRANSACTIONAL_MAX_CONCURRENCY = int(os.getenv("TRANSACTIONAL_MAX_CONCURRENCY", "16"))
+# Tempo máximo esperando uma vaga antes de responder 429
+CONCURRENCY_WAIT_SECONDS = float(os.getenv("CONCURRENCY_WAIT_SECONDS", "0.5"))
+# Backend compartilhado opcional, no formato "modulo:Classe"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND")
+
+# ========== IDEMPOTÊNCIA ==========
+# Respostas guardadas por Idempotency-Key ficam disponíveis por N horas
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Tempo que uma requisição repetida espera a primeira terminar (depois 409)
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# Chave "em andamento" sem resposta após N segundos é considerada abandonada
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+# ========== ARQUIVO ==========
+# Pneus vendidos/removidos e vendas com mais de N meses vão para as tabelas
+# de arquivo (0 desliga a compactação periódica)
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "0"))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))
+
+# ========== CACHE ==========
+# Validade (segundos) dos agregados em cache por usuário
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+
+# ========== EVENTOS (SSE) ==========
+# Intervalo do heartbeat enviado a conexões ociosas
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Eventos pendentes por conexão antes de o cliente ser considerado lento
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+# Intervalo do evento "resync" (recarregar o dashboard): cobre as escritas
+# atendidas por outros workers, que têm hubs próprios; 0 desativa
+SSE_RESYNC_SECONDS = float(os.getenv("SSE_RESYNC_SECONDS", "60"))
+
+# ========== JOBS EM BACKGROUND ==========
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+# Job "running" sem heartbeat há mais que isso é considerado órfão e retomado
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+# Limite de meses por job
+JOB_MAX_MONTHS = int(os.getenv("JOB_MAX_MONTHS", "120"))
+
+# ========== AUTENTICAÇÃO ==========
+SECRET_KEY = os.getenv("SECRET_KEY", "seu-secret-key-mude-isso")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+# ========== PERFIL SOB DEMANDA ==========
+# Com PROFILING_TOKEN definido, requisições com o header X-Profile-Token igual
+# a ele são perfiladas; sem ele nada é instalado
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+# Onde os perfis ficam guardados (compartilhado pelos workers da máquina)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "vipneus-profiles"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+
+# ========== STARTUP ==========
+# STARTUP_PROFILE=1 registra o custo de import/inicialização de cada etapa
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+# Meta de cold start (import + lifespan) em milissegundos
+STARTUP_TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "1500"))
@@ -1,31 +1,175 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, inspect, update
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker, Session
+from datetime import datetime, timedelta
+import threading
+import time
 
-load_dotenv()
+from . import config
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = config.DATABASE_URL or "sqlite:///./vipneus.db"
 
-if not DATABASE_URL:
-    DATABASE_URL = "sqlite:///./vipneus.db"
-    print("🔵 Modo desenvolvimento: usando SQLite local")
-else:
-    if DATABASE_URL.startswith("postgres://"):
-        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    print("🟢 Modo produção: usando PostgreSQL")
+def engine_options(url: str) -> dict:
+    """Argumentos de create_engine para a URL"""
+    if "sqlite" in url:
+        # SQLite precisa de check_same_thread=False
+        return {"connect_args": {"check_same_thread": False}}
+    # Pool dimensionado por worker (o total respeita DB_MAX_CONNECTIONS)
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+    }
 
-# SQLite precisa de check_same_thread=False
-connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+class TenantSession(Session):
+    """Sessão que envia os models por tenant (__tenant_scoped__) para a engine
+    dedicada do tenant, quando app.tenancy.scope definiu uma"""
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def get_bind(self, mapper=None, clause=None, **kw):
+        tenant_engine = self.info.get("tenant_engine")
+        if tenant_engine is not None and mapper is not None and getattr(mapper.class_, "__tenant_scoped__", False):
+            return tenant_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+# A engine só é criada quando o primeiro worker precisa dela (ver init_db)
+SessionLocal = sessionmaker(class_=TenantSession, autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(class_=TenantSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+_engine = None
+_replica_engine = None
+_replica_down_until = 0.0
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Cria a engine na primeira chamada e vincula o SessionLocal a ela"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if config.DATABASE_URL:
+                    print("🟢 Modo produção: usando PostgreSQL")
+                else:
+                    print("🔵 Modo desenvolvimento: usando SQLite local")
+                _engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+def get_replica_engine():
+    """Engine da réplica de leitura, ou None se DATABASE_REPLICA_URL não estiver definida"""
+    global _replica_engine
+    if _replica_engine is None and config.DATABASE_REPLICA_URL:
+        with _engine_lock:
+            if _replica_engine is None:
+                _replica_engine = create_engine(
+                    config.DATABASE_REPLICA_URL, **engine_options(config.DATABASE_REPLICA_URL)
+                )
+                ReadSessionLocal.configure(bind=_replica_engine)
+    return _replica_engine
+
+def dispose_engine():
+    """Descarta as conexões herdadas do processo pai (chamado após o fork)"""
+    # close=False: não fecha os sockets que ainda pertencem ao processo pai
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _replica_engine is not None:
+        _replica_engine.dispose(close=False)
+
+def __getattr__(name):
+    # Compatibilidade: `from .database import engine` continua funcionando
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def add_missing_columns(engine):
+    """Adiciona colunas novas (anuláveis) a tabelas que já existiam
+
+    create_all só cria tabelas inteiras; sem isso, colunas adicionadas aos
+    models quebrariam bancos já em produção.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                ))
+
+def create_schema(engine):
+    """Cria tabelas, partições, colunas e índices que faltam (DDL idempotente)"""
+    # Importa os models para registrar as tabelas no metadata
+    from . import models  # noqa: F401
+    from .partitions import ensure_partitions
+    Base.metadata.create_all(bind=engine)
+    ensure_partitions(engine)
+    add_missing_columns(engine)
+    # create_all não cria índices novos em tabelas que já existiam
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def init_db():
+    """Cria as tabelas e pré-conecta o pool (chamado no startup do worker)
+
+    Sob o gunicorn o DDL já rodou uma vez, antes dos workers (ver
+    gunicorn.conf.py), e aqui só o pool é aquecido: workers subindo em
+    paralelo não disputam CREATE/ALTER.
+    """
+    engine = get_engine()
+    if not config.schema_ready():
+        create_schema(engine)
+
+    # Abre as conexões agora para que a primeira requisição não pague o handshake
+    connections = [engine.connect() for _ in range(max(config.DB_POOL_WARMUP, 0))]
+    for conn in connections:
+        conn.execute(text("SELECT 1"))
+        conn.close()
+    return engine
+
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def replica_session(last_write_at: datetime = None):
+    """Sessão na réplica de leitura, ou None quando a leitura deve ir ao
+    primário: sem réplica, réplica fora do ar ou usuário que escreveu há
+    menos de REPLICA_STALENESS_SECONDS"""
+    global _replica_down_until
+    replica = get_replica_engine()
+    recent_write = last_write_at is not None and (
+        datetime.utcnow() - last_write_at < timedelta(seconds=config.REPLICA_STALENESS_SECONDS)
+    )
+    if replica is None or recent_write or time.monotonic() < _replica_down_until:
+        return None
+    db = ReadSessionLocal()
+    try:
+        # Abre a conexão agora: se a réplica caiu, o fallback é imediato
+        db.connection()
+        return db
+    except OperationalError:
+        db.close()
+        _replica_down_until = time.monotonic() + config.REPLICA_RETRY_SECONDS
+        print("⚠️  Réplica de leitura indisponível, usando o primário")
+        return None
+
+def mark_user_write(user_id: str):
+    """Registra a última escrita do usuário (só necessário com réplica)"""
+    if get_replica_engine() is None:
+        return
+    from .models import User
+    get_engine()
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user_id).values(last_write_at=datetime.utcnow()))
+        db.commit()
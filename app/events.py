@@ -0,0 +1,118 @@
+# app/events.py
+"""Pub/sub em memória para mudanças nos dados de um usuário
+
+As rotas de escrita publicam um evento após o commit. Listeners síncronos
+(ex.: invalidação de cache) rodam na hora; conexões SSE recebem o evento em
+uma fila limitada no event loop.
+
+Cada worker tem o seu hub: uma escrita atendida por outro worker não chega às
+conexões deste. Por isso o stream envia `resync` a cada SSE_RESYNC_SECONDS e o
+cliente recarrega o dashboard; o atraso máximo entre workers é esse intervalo.
+Entrega imediata entre workers exigiria um broker compartilhado (ex.: Redis
+pub/sub) alimentando o hub.
+"""
+import asyncio
+import json
+import threading
+
+from .cache import user_cache
+from .config import SSE_HEARTBEAT_SECONDS, SSE_QUEUE_SIZE, SSE_RESYNC_SECONDS
+from .database import mark_user_write
+
+class Subscriber:
+    """Conexão SSE de um usuário, com fila limitada"""
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+
+    def put(self, event: dict):
+        # Executado no event loop. Cliente lento: descarta o que está pendente
+        # e pede que ele recarregue o dashboard inteiro
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"type": "resync"}
+        self.queue.put_nowait(event)
+
+class EventHub:
+    def __init__(self):
+        self._subscribers = {}  # user_id -> set[Subscriber]
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Registra listener(user_id, event) chamado em toda publicação"""
+        self._listeners.append(listener)
+
+    def subscribe(self, user_id: str) -> Subscriber:
+        subscriber = Subscriber(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+
+    def publish(self, user_id: str, event: dict):
+        """Publica um evento; pode ser chamado de qualquer thread
+
+        Chamado depois do commit da rota: a falha de um listener é registrada
+        e não impede os outros nem a entrega às conexões SSE.
+        """
+        for listener in self._listeners:
+            try:
+                listener(user_id, event)
+            except Exception as exc:
+                print(f"⚠️  Listener de eventos falhou ({event.get('type')}): {exc!r}")
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+            except RuntimeError:
+                # Event loop já encerrado (shutdown)
+                pass
+
+async def event_stream(user_id: str):
+    """Gera o corpo SSE: eventos do usuário, heartbeat nas pausas e resync periódico
+
+    A inscrição acontece quando o corpo começa a ser enviado, dentro do
+    try/finally: um cliente que desconecta antes disso não deixa Subscriber.
+    """
+    subscriber = hub.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    next_resync = loop.time() + SSE_RESYNC_SECONDS
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            timeout = SSE_HEARTBEAT_SECONDS
+            if SSE_RESYNC_SECONDS > 0:
+                timeout = min(timeout, max(next_resync - loop.time(), 0))
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if SSE_RESYNC_SECONDS > 0 and loop.time() >= next_resync:
+                    event = {"type": "resync"}
+                else:
+                    yield ": ping\n\n"
+                    continue
+            if event["type"] == "resync":
+                next_resync = loop.time() + SSE_RESYNC_SECONDS
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
+
+hub = EventHub()
+
+# Qualquer mudança nos dados do usuário invalida seus agregados em cache
+hub.add_listener(lambda user_id, event: user_cache.invalidate_user(user_id))
+
+# Leituras logo após uma escrita do usuário vão para o primário
+hub.add_listener(lambda user_id, event: mark_user_write(user_id))
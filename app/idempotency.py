@@ -0,0 +1,163 @@
+# app/idempotency.py
+"""Idempotency-Key nas rotas de criação
+
+A primeira requisição com uma chave a reserva (linha "em andamento", com o
+hash do corpo) e grava a resposta na mesma transação da escrita da rota:
+ou as duas ficam no banco, ou nenhuma. Repetições recebem a resposta
+guardada sem executar a transação de novo; repetições simultâneas esperam a
+primeira sem segurar conexões do pool. Uma chave reutilizada com outro corpo
+é recusada. Erros não são guardados: a chave é liberada para nova tentativa.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .auth import get_user_id
+from .config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_WAIT_SECONDS, IDEMPOTENCY_LEASE_SECONDS
+from .database import SessionLocal, get_engine
+from .models import IdempotencyKey
+
+EVICT_INTERVAL_SECONDS = 300
+POLL_SECONDS = 0.05
+_last_eviction = 0.0
+
+class IdempotentRequest:
+    def __init__(self, user_id: str, key: Optional[str], route: str, request_hash: str):
+        self.user_id = user_id
+        self.key = key
+        self.route = route
+        self.request_hash = request_hash
+        self.replay = None  # JSONResponse guardada, se for uma repetição
+        self.lease = None   # expires_at da reserva feita por esta requisição
+
+    @property
+    def pending(self) -> bool:
+        return self.lease is not None
+
+    def _this_claim(self):
+        return (
+            IdempotencyKey.user_id == self.user_id,
+            IdempotencyKey.key == self.key,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.expires_at == self.lease
+        )
+
+    def save(self, db: Session, status_code: int, body):
+        """Grava a resposta na transação da rota (o commit é da rota) e devolve o corpo"""
+        if self.pending:
+            result = db.execute(
+                update(IdempotencyKey).where(*self._this_claim()).values(
+                    status_code=status_code,
+                    response=json.dumps(jsonable_encoder(body)),
+                    expires_at=datetime.utcnow() + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            if result.rowcount != 1:
+                # A reserva venceu e outra requisição assumiu a chave
+                raise HTTPException(status_code=409, detail="Reserva da Idempotency-Key expirou, tente novamente")
+        return body
+
+    def release(self):
+        """Remove a reserva se a resposta não foi gravada (a requisição falhou)"""
+        with SessionLocal() as db:
+            db.execute(delete(IdempotencyKey).where(*self._this_claim()))
+            db.commit()
+        self.lease = None
+
+def evict_expired(db: Session):
+    """Apaga chaves vencidas (no máximo uma vez a cada EVICT_INTERVAL_SECONDS)"""
+    global _last_eviction
+    if time.monotonic() - _last_eviction < EVICT_INTERVAL_SECONDS:
+        return
+    _last_eviction = time.monotonic()
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+    db.commit()
+
+def claim(request: IdempotentRequest):
+    """Reserva a chave ou carrega a resposta guardada, esperando se necessário"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    this_key = (IdempotencyKey.user_id == request.user_id, IdempotencyKey.key == request.key)
+    while True:
+        # Sessão curta por tentativa: nenhuma conexão fica presa durante a
+        # espera. Lê antes de inserir: o SELECT não bloqueia atrás da
+        # transação da requisição dona, o INSERT de uma chave duplicada sim
+        with SessionLocal() as db:
+            evict_expired(db)
+            now = datetime.utcnow()
+            existing = db.execute(select(
+                IdempotencyKey.route,
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response,
+                IdempotencyKey.expires_at
+            ).where(*this_key)).first()
+            
+            if existing is None:
+                lease = now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+                try:
+                    db.execute(insert(IdempotencyKey).values(
+                        user_id=request.user_id,
+                        key=request.key,
+                        route=request.route,
+                        request_hash=request.request_hash,
+                        expires_at=lease
+                    ))
+                    db.commit()
+                except IntegrityError:
+                    continue  # Outra requisição reservou antes
+                request.lease = lease
+                return
+            if existing.expires_at < now:
+                # Resposta vencida ou reserva abandonada
+                db.execute(delete(IdempotencyKey).where(*this_key, IdempotencyKey.expires_at == existing.expires_at))
+                db.commit()
+                continue
+            if existing.route != request.route:
+                raise HTTPException(status_code=422, detail="Idempotency-Key já usada em outra operação")
+            if existing.request_hash is not None and existing.request_hash != request.request_hash:
+                raise HTTPException(status_code=422, detail="Idempotency-Key já usada com outro corpo")
+            if existing.status_code is not None:
+                request.replay = JSONResponse(
+                    status_code=existing.status_code,
+                    content=json.loads(existing.response),
+                    headers={"Idempotent-Replayed": "true"}
+                )
+                return
+
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key ainda em processamento")
+        time.sleep(POLL_SECONDS)
+
+def idempotency(route: str):
+    """Dependência que trata o header Idempotency-Key de uma rota de criação
+
+    Deve vir antes de get_db/get_current_user na assinatura da rota: a espera
+    por uma requisição repetida acontece antes de a sessão ser aberta.
+    """
+    async def dependency(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None, max_length=255),
+        user_id: str = Depends(get_user_id)
+    ):
+        body = await request.body()
+        idem = IdempotentRequest(user_id, idempotency_key, route, hashlib.sha256(body).hexdigest())
+        if idempotency_key:
+            get_engine()
+            await run_in_threadpool(claim, idem)
+        try:
+            yield idem
+        finally:
+            if idem.pending:
+                await run_in_threadpool(idem.release)
+    return dependency
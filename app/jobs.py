@@ -0,0 +1,170 @@
+# app/jobs.py
+"""Jobs em background para relatórios pesados, sem broker externo
+
+Os jobs ficam na tabela report_jobs: status e resultado sobrevivem a
+restarts, e jobs interrompidos são retomados no startup do worker.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, or_, and_
+from sqlalchemy.orm import Session
+
+from .config import JOBS_MAX_WORKERS, JOB_STALE_SECONDS
+from .database import SessionLocal, get_engine
+from .models import ReportJob, JobStatusEnum
+from .tenancy import scope
+
+_executor = None
+_running = set()  # Jobs executando neste processo
+_running_lock = threading.Lock()
+_stopping = threading.Event()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOBS_MAX_WORKERS, thread_name_prefix="report-job")
+    return _executor
+
+def iter_months(start, end):
+    """Gera (ano, mês) de start até end, inclusivo"""
+    year, mon = start
+    while (year, mon) <= end:
+        yield year, mon
+        mon += 1
+        if mon > 12:
+            year, mon = year + 1, 1
+
+def _claimable():
+    """Jobs que um worker pode assumir: pendentes ou órfãos (sem heartbeat)"""
+    stale = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    return or_(
+        ReportJob.status == JobStatusEnum.pending,
+        and_(ReportJob.status == JobStatusEnum.running, ReportJob.updated_at < stale)
+    )
+
+def submit_report_job(db: Session, user_id: str, start, end) -> ReportJob:
+    """Registra um job de relatório por período e agenda sua execução"""
+    job = ReportJob(
+        kind="range",
+        params=json.dumps({"start": list(start), "end": list(end)}),
+        total=len(list(iter_months(start, end))),
+        user_id=user_id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _get_executor().submit(run_job, job.id)
+    return job
+
+def _claim(db: Session, job_id: str) -> bool:
+    # UPDATE condicional: só um worker (ou processo) consegue assumir o job
+    result = db.execute(
+        update(ReportJob)
+        .where(ReportJob.id == job_id, _claimable())
+        .values(status=JobStatusEnum.running, updated_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def run_job(job_id: str):
+    """Executa um job de relatório, um mês por vez, registrando o progresso
+
+    Cada mês é um SUM/COUNT agrupado no banco (aggregate_range): o job guarda
+    só os totais, nunca as vendas e compras do mês.
+    """
+    # Import tardio: o router de relatórios também importa este módulo
+    from .routers.reports import aggregate_range, month_range
+
+    get_engine()
+    db = SessionLocal()
+    try:
+        if _stopping.is_set() or not _claim(db, job_id):
+            return
+        with _running_lock:
+            _running.add(job_id)
+        job = db.get(ReportJob, job_id)
+        scope(db, job.user_id)
+        params = json.loads(job.params)
+        
+        months = []
+        totals = {"total_vendas": 0.0, "total_compras": 0.0, "lucro": 0.0, "sales_count": 0, "purchases_count": 0}
+        empty = dict(totals)
+        for year, mon in iter_months(tuple(params["start"]), tuple(params["end"])):
+            if _stopping.is_set():
+                # Shutdown: shutdown_jobs devolve o job a pending
+                return
+            buckets = aggregate_range(db, job.user_id, *month_range((year, mon), (year, mon)), "month")
+            summary = buckets.get(f"{year:04d}-{mon:02d}", empty)
+            for key in totals:
+                totals[key] += summary[key]
+            months.append({"month": f"{year}-{mon:02d}", **summary})
+            
+            # Progresso por mês (também serve de heartbeat)
+            job.progress = len(months)
+            job.updated_at = datetime.utcnow()
+            db.commit()
+        
+        job.result = json.dumps({
+            "start": "{}-{:02d}".format(*params["start"]),
+            "end": "{}-{:02d}".format(*params["end"]),
+            **totals,
+            "months": months
+        })
+        job.status = JobStatusEnum.done
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        db.execute(
+            update(ReportJob).where(ReportJob.id == job_id).values(
+                status=JobStatusEnum.failed,
+                error=str(exc)[:500],
+                finished_at=datetime.utcnow()
+            )
+        )
+        db.commit()
+    finally:
+        with _running_lock:
+            _running.discard(job_id)
+        db.close()
+
+def resume_pending_jobs():
+    """Reagenda jobs pendentes ou interrompidos por um restart"""
+    db = SessionLocal()
+    try:
+        job_ids = [job_id for (job_id,) in db.query(ReportJob.id).filter(_claimable()).all()]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        _get_executor().submit(run_job, job_id)
+
+def resubmit_if_stale(job: ReportJob):
+    """Reagenda um job "running" cujo worker parou de dar heartbeat"""
+    stale = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    if job.status == JobStatusEnum.running and job.updated_at < stale:
+        _get_executor().submit(run_job, job.id)
+
+def shutdown_jobs():
+    """Para os jobs do processo e devolve os que estavam rodando a pending
+
+    Sem isso um job interrompido (restart, reciclagem do worker) ficaria
+    "running" até JOB_STALE_SECONDS sem heartbeat.
+    """
+    _stopping.set()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    with _running_lock:
+        job_ids = list(_running)
+    if not job_ids:
+        return
+    with SessionLocal() as db:
+        db.execute(
+            update(ReportJob).where(
+                ReportJob.id.in_(job_ids),
+                ReportJob.status == JobStatusEnum.running
+            ).values(status=JobStatusEnum.pending, progress=0)
+        )
+        db.commit()
@@ -1,15 +1,64 @@
+# Importado primeiro: o relógio do perfil de startup começa aqui
+from .startup import profile
+
+from contextlib import asynccontextmanager
+import asyncio
+import importlib
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .routers import auth, tires, sales, purchases, dashboard,reports
 
-# Cria as tabelas
-Base.metadata.create_all(bind=engine)
+from .config import STARTUP_PROFILE, ARCHIVE_AFTER_MONTHS, PROFILING_TOKEN
+
+ROUTERS = ["auth", "tires", "sales", "purchases", "dashboard", "reports", "catalog"]
+
+def startup(app: FastAPI):
+    """Inicialização pesada do worker: engine, tabelas, pool e chaves JWT"""
+    from .database import init_db, SessionLocal
+    from .auth import setup_keys
+    from .jobs import resume_pending_jobs
+    from .month_index import backfill_if_empty
+    from .catalog import catalog
+
+    # Cria a engine, as tabelas e pré-conecta o pool
+    with profile.step("init_db"):
+        init_db()
+    with profile.step("setup_keys"):
+        setup_keys()
+    with profile.step("catalog"):
+        catalog.migrate_if_empty()
+    with profile.step("backfill_month_index"):
+        with SessionLocal() as db:
+            backfill_if_empty(db)
+    with profile.step("resume_pending_jobs"):
+        resume_pending_jobs()
+
+    app.state.startup_report = profile.report()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup(app)
+    if STARTUP_PROFILE:
+        from .startup import print_report
+        print_report(app.state.startup_report)
+
+    compaction = None
+    if ARCHIVE_AFTER_MONTHS > 0:
+        from .archive import compaction_loop
+        compaction = asyncio.create_task(compaction_loop())
+
+    yield
+
+    if compaction is not None:
+        compaction.cancel()
+    from .jobs import shutdown_jobs
+    shutdown_jobs()
 
 app = FastAPI(
     title="API Gestão de Pneus",
     description="API REST para gerenciamento de pneus, vendas e compras",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -17,17 +66,21 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://vipneus-frontend.vercel.app","https://vipneus.vercel.app"],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Profile-Id"],
 )
 
-# Rotas
-app.include_router(auth.router)
-app.include_router(tires.router)
-app.include_router(sales.router)
-app.include_router(purchases.router)
-app.include_router(dashboard.router)
-app.include_router(reports.router)
+# Rotas (cada import é medido no perfil de startup)
+for name in ROUTERS:
+    with profile.step(f"import routers.{name}"):
+        module = importlib.import_module(f".routers.{name}", __package__)
+    app.include_router(module.router)
+
+# Perfil sob demanda por requisição (nada é instalado sem PROFILING_TOKEN)
+if PROFILING_TOKEN:
+    from .profiling import install_profiling
+    install_profiling(app)
 
 
 @app.get("/")
@@ -40,4 +93,4 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
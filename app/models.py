@@ -1,17 +1,47 @@
 # models.py
-from sqlalchemy import Boolean, Column, String, Float, DateTime, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, String, Float, DateTime, ForeignKey, Enum, Integer, Text, Index, Table, UniqueConstraint, event, text
+from sqlalchemy.orm import relationship, Session, with_loader_criteria
 from datetime import datetime
 import uuid
 import enum
+from .config import DB_PARTITIONING
 from .database import Base
 
+# Índices parciais: só linhas vivas (deleted_at IS NULL) entram no índice
+LIVE_ROWS = text("deleted_at IS NULL")
+
+def live_index(name: str, *columns) -> Index:
+    return Index(name, *columns, postgresql_where=LIVE_ROWS, sqlite_where=LIVE_ROWS)
+
+def partitioned_table_args(*args):
+    """__table_args__ de tabelas particionadas por data (RANGE em `data`)"""
+    if DB_PARTITIONING:
+        return args + ({"postgresql_partition_by": "RANGE (data)"},)
+    return args
+
 class TireConditionEnum(str, enum.Enum):
     novo = "novo"
     seminovo = "seminovo"
     recapado = "recapado"
     meia_vida = "meia-vida"
 
+class JobStatusEnum(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class TenantScopedMixin:
+    """Dados de um usuário (tenant): consultas ORM recebem user_id automaticamente
+    e podem ir para um banco dedicado (ver app/tenancy.py)"""
+    __tenant_scoped__ = True
+    user_id = Column(String, ForeignKey("users.id"))
+
+class SoftDeleteMixin:
+    """Linhas removidas ficam com deleted_at preenchido (trilha de auditoria)
+    e somem das consultas ORM; a compactação as move para o arquivo"""
+    deleted_at = Column(DateTime, nullable=True)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -19,13 +49,37 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Última escrita do usuário: leituras logo depois evitam a réplica
+    last_write_at = Column(DateTime, nullable=True)
     
     tires = relationship("Tire", back_populates="owner")
     sales = relationship("Sale", back_populates="owner")
     purchases = relationship("Purchase", back_populates="owner")
 
-class Tire(Base):
+# ========== CATÁLOGO ==========
+class Brand(Base):
+    """Marca normalizada; `key` é o nome sem diferença de caixa/espaços"""
+    __tablename__ = "brands"
+    
+    id = Column(Integer, primary_key=True)
+    key = Column(String, unique=True, nullable=False)
+    name = Column(String, nullable=False)  # Grafia exibida (a primeira cadastrada)
+
+class Size(Base):
+    """Medida + aro normalizados (ex.: 205/55 aro R16)"""
+    __tablename__ = "sizes"
+    __table_args__ = (UniqueConstraint("medida", "aro", name="uq_sizes_medida_aro"),)
+    
+    id = Column(Integer, primary_key=True)
+    medida = Column(String, nullable=False)
+    aro = Column(String, nullable=False)
+
+class Tire(TenantScopedMixin, SoftDeleteMixin, Base):
     __tablename__ = "tires"
+    __table_args__ = (
+        # Estoque de um usuário por data de entrada (envelhecimento do estoque)
+        live_index("ix_tires_live_user_vendido_entrada", "user_id", "vendido", "data_entrada"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     marca = Column(String, nullable=False)
@@ -36,38 +90,134 @@ class Tire(Base):
     data_saida = Column(DateTime, nullable=True)
     detalhes = Column(String, nullable=True)
     vendido = Column(Boolean, default=False)
+    # Catálogo (marca/medida/aro acima ficam na forma canônica)
+    brand_id = Column(Integer, ForeignKey("brands.id"), nullable=True)
+    size_id = Column(Integer, ForeignKey("sizes.id"), nullable=True)
     
     # NOVA: FK opcional para compra (se veio de uma compra)
-    purchase_id = Column(String, ForeignKey("purchases.id"), nullable=True)
-    purchase = relationship("Purchase", back_populates="tire")
+    # Com particionamento purchases.id não é único sozinho e não pode ser alvo de FK
+    purchase_id = Column(String, *([] if DB_PARTITIONING else [ForeignKey("purchases.id")]), nullable=True)
+    purchase = relationship(
+        "Purchase",
+        back_populates="tire",
+        primaryjoin="foreign(Tire.purchase_id) == Purchase.id"
+    )
     
-    user_id = Column(String, ForeignKey("users.id"))
     owner = relationship("User", back_populates="tires")
 
-class Sale(Base):
+class Sale(TenantScopedMixin, SoftDeleteMixin, Base):
     __tablename__ = "sales"
+    __table_args__ = partitioned_table_args(
+        # Consultas por período de um usuário (relatórios e dashboard)
+        live_index("ix_sales_live_user_data", "user_id", "data"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     tire_id = Column(String, ForeignKey("tires.id"), nullable=False)
-    data = Column(DateTime, default=datetime.utcnow)
+    # Particionada, a chave de partição precisa fazer parte da PK
+    data = Column(DateTime, primary_key=DB_PARTITIONING, default=datetime.utcnow)
     valor = Column(Float, nullable=False)
     
-    user_id = Column(String, ForeignKey("users.id"))
     owner = relationship("User", back_populates="sales")
     tire = relationship("Tire", backref="sale")
 
-class Purchase(Base):
+class Purchase(TenantScopedMixin, SoftDeleteMixin, Base):
     __tablename__ = "purchases"
+    __table_args__ = partitioned_table_args(
+        live_index("ix_purchases_live_user_data", "user_id", "data"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    data = Column(DateTime, default=datetime.utcnow)
+    data = Column(DateTime, primary_key=DB_PARTITIONING, default=datetime.utcnow)
     valor = Column(Float, nullable=False)
     marca = Column(String, nullable=False)
     medida = Column(String, nullable=False)
     aro = Column(String, nullable=False)
     condicao = Column(Enum(TireConditionEnum), nullable=False)
     detalhes = Column(String, nullable=True)
+    brand_id = Column(Integer, ForeignKey("brands.id"), nullable=True)
+    size_id = Column(Integer, ForeignKey("sizes.id"), nullable=True)
     
-    user_id = Column(String, ForeignKey("users.id"))
     owner = relationship("User", back_populates="purchases")
-    tire = relationship("Tire", back_populates="purchase", uselist=False)
\ No newline at end of file
+    tire = relationship(
+        "Tire",
+        back_populates="purchase",
+        uselist=False,
+        primaryjoin="foreign(Tire.purchase_id) == Purchase.id"
+    )
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(String, nullable=False)
+    params = Column(Text, nullable=False)  # JSON
+    status = Column(Enum(JobStatusEnum), nullable=False, default=JobStatusEnum.pending)
+    progress = Column(Integer, default=0)  # Meses processados
+    total = Column(Integer, default=0)     # Meses a processar
+    result = Column(Text, nullable=True)   # JSON
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Heartbeat do worker
+    finished_at = Column(DateTime, nullable=True)
+    
+    user_id = Column(String, ForeignKey("users.id"), index=True)
+
+class UserMonth(Base):
+    """Índice de meses com movimento por usuário (mantido pelas escritas)"""
+    __tablename__ = "user_months"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    sales_count = Column(Integer, nullable=False, default=0)
+    purchases_count = Column(Integer, nullable=False, default=0)
+
+
+class IdempotencyKey(Base):
+    """Resposta guardada de uma requisição com Idempotency-Key"""
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(String, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    route = Column(String, nullable=False)
+    request_hash = Column(String(64), nullable=True)  # SHA-256 do corpo da requisição
+    status_code = Column(Integer, nullable=True)  # None enquanto em andamento
+    response = Column(Text, nullable=True)        # JSON
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+# ========== ARQUIVO ==========
+def archive_table(source: Table, *indexes) -> Table:
+    """Tabela de arquivo com as mesmas colunas da origem (sem FKs) + archived_at"""
+    return Table(
+        f"{source.name}_archive",
+        Base.metadata,
+        *[Column(column.name, column.type, primary_key=column.primary_key) for column in source.columns],
+        Column("archived_at", DateTime, nullable=False),
+        *indexes
+    )
+
+tires_archive = archive_table(Tire.__table__)
+sales_archive = archive_table(Sale.__table__, Index("ix_sales_archive_user_data", "user_id", "data"))
+
+@event.listens_for(Session, "do_orm_execute")
+def hide_deleted_rows(execute_state):
+    """Filtra deleted_at IS NULL em toda consulta/UPDATE/DELETE ORM
+
+    Use .execution_options(include_deleted=True) para ver as removidas.
+    Cargas de relacionamento não são filtradas: uma venda continua
+    enxergando o pneu mesmo que ele tenha sido removido depois.
+    """
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.execution_options.get("include_deleted", False):
+        return
+    if execute_state.is_select or execute_state.is_update or execute_state.is_delete:
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True,
+                propagate_to_loaders=False
+            )
+        )
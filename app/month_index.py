@@ -0,0 +1,89 @@
+# app/month_index.py
+"""Índice de meses com vendas/compras por usuário (tabela user_months)
+
+As rotas de escrita ajustam os contadores na mesma transação, então
+/reports/months lê só algumas linhas em vez de varrer vendas e compras.
+"""
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import Sale, Purchase, UserMonth
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def month_key(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+def track(db: Session, user_id: str, when: datetime, sales: int = 0, purchases: int = 0):
+    """Soma (ou subtrai) vendas/compras no contador do mês de `when`"""
+    month = month_key(when)
+    insert = UPSERT_DIALECTS.get(db.bind.dialect.name)
+    
+    if insert is not None:
+        # Upsert atômico: escritas concorrentes no mesmo mês não conflitam
+        stmt = insert(UserMonth).values(
+            user_id=user_id,
+            month=month,
+            sales_count=max(sales, 0),
+            purchases_count=max(purchases, 0)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserMonth.user_id, UserMonth.month],
+            set_={
+                "sales_count": UserMonth.sales_count + sales,
+                "purchases_count": UserMonth.purchases_count + purchases
+            }
+        )
+        db.execute(stmt)
+        return
+    
+    # Outros bancos (MySQL): ler e atualizar
+    row = db.get(UserMonth, (user_id, month))
+    if row is None:
+        row = UserMonth(user_id=user_id, month=month, sales_count=0, purchases_count=0)
+        db.add(row)
+    row.sales_count = max(row.sales_count + sales, 0)
+    row.purchases_count = max(row.purchases_count + purchases, 0)
+
+def list_months(db: Session, user_id: str) -> list:
+    """Meses com movimento do usuário, do mais recente para o mais antigo"""
+    rows = db.query(UserMonth.month).filter(
+        UserMonth.user_id == user_id,
+        UserMonth.sales_count + UserMonth.purchases_count > 0
+    ).order_by(UserMonth.month.desc()).all()
+    return [month for (month,) in rows]
+
+def rebuild(db: Session):
+    """Recalcula o índice inteiro a partir de vendas e compras"""
+    # Import tardio: o router de relatórios importa este módulo
+    from .routers.reports import bucket_expr
+    
+    counts = {}
+    for model, field in ((Sale, "sales_count"), (Purchase, "purchases_count")):
+        month = bucket_expr(db, model.data, "month")
+        rows = db.query(model.user_id, month, func.count(model.id)).group_by(model.user_id, month).all()
+        for user_id, key, count in rows:
+            counts.setdefault((user_id, key), {"sales_count": 0, "purchases_count": 0})[field] = count
+    
+    db.query(UserMonth).delete(synchronize_session=False)
+    db.bulk_insert_mappings(UserMonth, [
+        {"user_id": user_id, "month": month, **values}
+        for (user_id, month), values in counts.items()
+    ])
+    db.commit()
+
+def backfill_if_empty(db: Session):
+    """Popula o índice em bancos que já tinham dados antes dele existir"""
+    if db.query(UserMonth.user_id).first() is not None:
+        return
+    if db.query(Sale.id).first() is None and db.query(Purchase.id).first() is None:
+        return
+    try:
+        rebuild(db)
+    except IntegrityError:
+        # Outro worker fez o backfill ao mesmo tempo
+        db.rollback()
@@ -0,0 +1,89 @@
+# app/partitions.py
+"""Partições por data de sales e purchases (PostgreSQL com DB_PARTITIONING=1)
+
+Uso:
+    python -m app.partitions ensure             # cria as partições que faltam
+    python -m app.partitions detach sales 2020-01  # desanexa para arquivar
+
+Cada tabela tem partições mensais (ou anuais) de PARTITION_START até
+PARTITION_MONTHS_AHEAD meses à frente, mais uma partição DEFAULT para datas
+fora do intervalo. Consultas com filtro de período (data >= início AND
+data < fim) leem só as partições do intervalo.
+"""
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+from .config import DB_PARTITIONING, PARTITION_INTERVAL, PARTITION_START, PARTITION_MONTHS_AHEAD
+
+PARTITIONED_TABLES = ["sales", "purchases"]
+
+def add_months(year: int, mon: int, months: int):
+    index = year * 12 + (mon - 1) + months
+    return index // 12, index % 12 + 1
+
+def partition_name(table: str, year: int, mon: int) -> str:
+    if PARTITION_INTERVAL == "year":
+        return f"{table}_p{year}"
+    return f"{table}_p{year}_{mon:02d}"
+
+def partition_bounds(now: datetime = None):
+    """((ano, mês), início, fim) de cada partição do intervalo configurado"""
+    now = now or datetime.utcnow()
+    step = 12 if PARTITION_INTERVAL == "year" else 1
+    year, mon = (int(part) for part in PARTITION_START.split("-"))
+    if step == 12:
+        mon = 1
+    last = add_months(now.year, now.month, PARTITION_MONTHS_AHEAD)
+    while (year, mon) <= last:
+        next_year, next_mon = add_months(year, mon, step)
+        yield (year, mon), datetime(year, mon, 1), datetime(next_year, next_mon, 1)
+        year, mon = next_year, next_mon
+
+def ensure_partitions(engine):
+    """Cria as partições que ainda não existem (idempotente)"""
+    if not DB_PARTITIONING:
+        return
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+        for (year, mon), start, end in partition_bounds():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {partition_name(table, year, mon)} "
+                        f"PARTITION OF {table} FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+                    ))
+            except Exception as exc:
+                # Ex.: a partição DEFAULT já tem linhas desse período
+                print(f"⚠️  Partição {partition_name(table, year, mon)} não criada: {exc}")
+
+def detach_partition(engine, table: str, month: str) -> str:
+    """Desanexa a partição do mês (YYYY-MM): os dados saem das consultas e a
+    tabela resultante pode ser exportada ou movida para armazenamento frio"""
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Tabela não particionada: {table}")
+    year, mon = (int(part) for part in month.split("-"))
+    name = partition_name(table, year, mon)
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    return name
+
+def main(argv):
+    from .database import get_engine
+    
+    if not DB_PARTITIONING:
+        print("Particionamento desligado (DB_PARTITIONING=1 e PostgreSQL são necessários)")
+        return 1
+    if argv[:1] == ["ensure"]:
+        ensure_partitions(get_engine())
+    elif argv[:1] == ["detach"] and len(argv) == 3:
+        print(f"Partição {detach_partition(get_engine(), argv[1], argv[2])} desanexada")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
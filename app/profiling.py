@@ -0,0 +1,220 @@
+# app/profiling.py
+"""Perfil sob demanda de uma requisição (diagnóstico em produção)
+
+Só é instalado com PROFILING_TOKEN definido: sem ele não há middleware,
+wrapper nem listener, e o custo é zero. Instalado, uma requisição com o
+header X-Profile-Token igual ao token roda a rota sob cProfile e registra
+cada SQL executado com o tempo (o token não é aceito na query string, que
+vai para os logs de acesso). A resposta ganha o header X-Profile-Id; o perfil
+fica em PROFILE_DIR e é lido em /admin/profiles/{id} (resumo JSON ou o
+arquivo pstats, para snakeviz / python -m pstats).
+
+O cProfile cobre a função da rota (síncrona, na thread do threadpool); as
+dependências (autenticação, sessão) aparecem só pelo SQL e pelo tempo total.
+"""
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from .config import PROFILING_TOKEN, PROFILE_DIR, PROFILE_MAX_STORED
+
+# Perfil da requisição atual (propaga para o threadpool junto com o contexto)
+current_profile: ContextVar = ContextVar("current_profile", default=None)
+
+# Funções listadas no resumo JSON
+TOP_FUNCTIONS = 30
+
+def valid_token(token: str) -> bool:
+    return bool(PROFILING_TOKEN) and hmac.compare_digest(token or "", PROFILING_TOKEN)
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.status = None
+        self.started_at = datetime.utcnow()
+        self.sql = []
+        self.stats = None
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def run(self, call, *args, **kwargs):
+        """Executa `call` sob cProfile (na thread atual)"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profiler.disable()
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler, stream=io.StringIO())
+            else:
+                self.stats.add(profiler)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+
+    def top_functions(self) -> list:
+        if self.stats is None:
+            return []
+        rows = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in self.stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "total_ms": round(total * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3)
+            })
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "sql_count": len(self.sql),
+            "sql_ms": round(sum(query["duration_ms"] for query in self.sql), 2),
+            "sql": self.sql,
+            "top_functions": self.top_functions()
+        }
+
+# ========== ARMAZENAMENTO ==========
+def profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{extension}")
+
+def store(profile: RequestProfile):
+    """Grava o resumo (.json) e o pstats (.prof), mantendo os PROFILE_MAX_STORED mais novos"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(profile_path(profile.id, "json"), "w") as file:
+        json.dump(profile.summary(), file)
+    if profile.stats is not None:
+        profile.stats.dump_stats(profile_path(profile.id, "prof"))
+
+    summaries = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in summaries[:max(len(summaries) - PROFILE_MAX_STORED, 0)]:
+        profile_id = entry.name[:-len(".json")]
+        for extension in ("json", "prof"):
+            try:
+                os.remove(profile_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+def list_profiles() -> list:
+    """Resumos guardados (sem SQL e funções), do mais recente ao mais antigo"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    result = []
+    for entry in os.scandir(PROFILE_DIR):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path) as file:
+                summary = json.load(file)
+        except (OSError, ValueError):
+            continue
+        result.append({key: summary[key] for key in ("id", "method", "path", "status", "started_at", "duration_ms", "sql_count", "sql_ms")})
+    result.sort(key=lambda summary: summary["started_at"], reverse=True)
+    return result
+
+# ========== SQL ==========
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is None or not starts:
+        return
+    # Parâmetros não são guardados (podem conter dados sensíveis)
+    profile.sql.append({
+        "statement": statement,
+        "duration_ms": round((time.perf_counter() - starts.pop()) * 1000, 3),
+        "executemany": executemany
+    })
+
+# ========== MIDDLEWARE ==========
+class ProfilingMiddleware:
+    """Middleware ASGI: perfila a requisição se o token de perfil vier junto"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile-token":
+                return valid_token(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        # As rotas de admin usam o mesmo header e não são perfiladas
+        if scope["type"] != "http" or scope["path"].startswith("/admin/profiles") or not self.requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            current_profile.reset(token)
+            profile.finish()
+            # Escrita em disco fora do event loop
+            await run_in_threadpool(store, profile)
+
+def profiled(call):
+    """Envolve a função de uma rota síncrona para rodar sob cProfile quando pedido"""
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        return profile.run(call, *args, **kwargs)
+    return wrapper
+
+def install_profiling(app: FastAPI):
+    """Instala middleware, wrappers das rotas, listeners SQL e rotas de admin"""
+    from .routers import admin
+
+    for route in app.routes:
+        # Rotas async (SSE) ficam só com SQL e tempo: o cProfile na thread do
+        # event loop misturaria outras requisições
+        if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = profiled(route.dependant.call)
+    app.include_router(admin.router)
+    app.add_middleware(ProfilingMiddleware)
+
+    # Todas as engines (primário, réplica, tenants)
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", after_cursor_execute)
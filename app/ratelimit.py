@@ -0,0 +1,125 @@
+# app/ratelimit.py
+"""Controle de admissão: token bucket por usuário/rota e limite de concorrência
+
+Rotas de analytics (dashboard, relatórios) e rotas transacionais (vendas,
+compras, estoque) têm buckets e vagas separados, então uma rajada de
+relatórios recebe 429 sem atrasar o registro de vendas.
+
+As duas dependências só leem o token JWT (sem banco) e entram em
+`dependencies=` da rota, que o FastAPI resolve antes dos parâmetros: uma
+requisição na fila ou recusada ainda não abriu sessão nem pegou conexão.
+"""
+import importlib
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+
+from fastapi import Depends, HTTPException, Request, status
+
+from .auth import get_user_id
+from .config import (
+    ANALYTICS_RATE, ANALYTICS_BURST, WRITE_RATE, WRITE_BURST,
+    ANALYTICS_MAX_CONCURRENCY, TRANSACTIONAL_MAX_CONCURRENCY,
+    CONCURRENCY_WAIT_SECONDS, RATE_LIMIT_BACKEND
+)
+
+class RateLimitBackend(ABC):
+    """Interface dos backends de token bucket
+
+    Um backend compartilhado (ex.: Redis) permite que todos os workers
+    dividam o mesmo limite; configure com RATE_LIMIT_BACKEND="modulo:Classe".
+    Um backend sem hit() falha já ao ser instanciado, no import.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, rate: float, burst: int) -> float:
+        """Consome um token; retorna 0 se permitido ou os segundos até o próximo token"""
+
+class InMemoryBackend(RateLimitBackend):
+    """Buckets na memória do worker (o limite efetivo é por worker)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, último acesso)
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed = True
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed = False
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+        return 0 if allowed else (1 - tokens) / rate
+
+    def _evict(self, now: float):
+        # Buckets parados há mais de 10 min já estariam cheios de novo
+        for key in [key for key, (_, last) in self._buckets.items() if now - last > 600]:
+            del self._buckets[key]
+
+def load_backend() -> RateLimitBackend:
+    if not RATE_LIMIT_BACKEND:
+        return InMemoryBackend()
+    module_name, class_name = RATE_LIMIT_BACKEND.split(":")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(backend_class, type) and issubclass(backend_class, RateLimitBackend)):
+        raise TypeError(f"RATE_LIMIT_BACKEND={RATE_LIMIT_BACKEND} não é um RateLimitBackend")
+    return backend_class()
+
+backend = load_backend()
+
+def set_backend(new_backend: RateLimitBackend):
+    global backend
+    backend = new_backend
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Muitas requisições, tente novamente em instantes",
+        headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+    )
+
+class RateLimit:
+    """Dependência: token bucket por (classe, rota, usuário)"""
+
+    def __init__(self, scope: str, rate: float, burst: int):
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+
+    def __call__(self, request: Request, user_id: str = Depends(get_user_id)):
+        route = request.scope.get("route")
+        key = f"{self.scope}:{getattr(route, 'path', request.url.path)}:{user_id}"
+        retry_after = backend.hit(key, self.rate, self.burst)
+        if retry_after:
+            raise too_many_requests(retry_after)
+
+class ConcurrencyLimit:
+    """Dependência: limita requisições simultâneas de uma classe no worker"""
+
+    def __init__(self, limit: int):
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def __call__(self):
+        if not self._slots.acquire(timeout=CONCURRENCY_WAIT_SECONDS):
+            raise too_many_requests(1)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+analytics_rate = RateLimit("analytics", ANALYTICS_RATE, ANALYTICS_BURST)
+write_rate = RateLimit("write", WRITE_RATE, WRITE_BURST)
+analytics_slots = ConcurrencyLimit(ANALYTICS_MAX_CONCURRENCY)
+transactional_slots = ConcurrencyLimit(TRANSACTIONAL_MAX_CONCURRENCY)
+
+# Listas prontas para `dependencies=` das rotas
+ANALYTICS_LIMITS = [Depends(analytics_rate), Depends(analytics_slots)]
+WRITE_LIMITS = [Depends(write_rate), Depends(transactional_slots)]
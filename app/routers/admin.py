@@ -0,0 +1,37 @@
+# app/routers/admin.py
+# Registrado só com PROFILING_TOKEN definido (ver app/profiling.py)
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import FileResponse
+
+from ..profiling import valid_token, profile_path, list_profiles
+
+def require_profiling_token(x_profile_token: str = Header("")):
+    if not valid_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Token de perfil inválido")
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin"], dependencies=[Depends(require_profiling_token)])
+
+@router.get("/")
+def get_profiles():
+    """Perfis guardados neste servidor, do mais recente ao mais antigo"""
+    return list_profiles()
+
+@router.get("/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|pstats)$", description="json (resumo com SQL) ou pstats")
+):
+    """Resumo do perfil (SQL e funções mais caras) ou o arquivo pstats"""
+    if not profile_id.isalnum():
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    
+    extension = "json" if format == "json" else "prof"
+    path = profile_path(profile_id, extension)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    
+    if format == "json":
+        return FileResponse(path, media_type="application/json")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
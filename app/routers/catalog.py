@@ -0,0 +1,28 @@
+# app/routers/catalog.py
+from fastapi import APIRouter, Depends, Query
+from typing import List
+
+from ..models import User
+from ..schemas import CatalogSize
+from ..auth import get_current_user
+from ..catalog import catalog
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+@router.get("/brands", response_model=List[str])
+def search_brands(
+    q: str = Query("", description="Início do nome da marca"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Autocomplete de marcas (catálogo em memória, sem consulta ao banco)"""
+    return catalog.search_brands(q, limit)
+
+@router.get("/sizes", response_model=List[CatalogSize])
+def search_sizes(
+    q: str = Query("", description="Início da medida"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Autocomplete de medidas com o aro"""
+    return catalog.search_sizes(q, limit)
@@ -1,58 +1,51 @@
 # app/routers/dashboard.py
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, case, text
 from typing import List, Dict
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from ..database import get_db
 from ..models import Tire, Sale, Purchase, User
-from ..auth import get_current_user
+from ..auth import get_current_user, get_stream_user_id, get_read_db
+from ..ratelimit import ANALYTICS_LIMITS
+from ..cache import user_cache
+from ..events import event_stream
+from ..catalog import catalog
+from .reports import sales_with_cost
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/")
+@router.get("/", dependencies=ANALYTICS_LIMITS)
 def get_dashboard_data(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Retorna dados consolidados para o dashboard"""
     
-    # Estatísticas gerais
-    total_tires = db.query(Tire).filter(
+    # Estatísticas gerais (só colunas agregadas, sem carregar entidades)
+    total_tires = db.query(func.count(Tire.id)).filter(
         Tire.user_id == current_user.id,
         Tire.vendido == False
-    ).count()
+    ).scalar()
     
-    total_sold = db.query(Sale).filter(
-        Sale.user_id == current_user.id
-    ).count()
-    
-    total_purchased = db.query(Purchase).filter(
-        Purchase.user_id == current_user.id
-    ).count()
-    
-    # Total entrada (compras)
-    total_entrada = db.query(func.sum(Purchase.valor)).filter(
+    # Compras: quantidade e total entrada
+    total_purchased, total_entrada = db.query(
+        func.count(Purchase.id),
+        func.coalesce(func.sum(Purchase.valor), 0)
+    ).filter(
         Purchase.user_id == current_user.id
-    ).scalar() or 0
-    
-    # Total saída (vendas)
-    total_saida = db.query(func.sum(Sale.valor)).filter(
+    ).one()
+    
+    # Vendas: quantidade, total saída e lucro real (venda sem custo, ou seja,
+    # pneu adicionado manualmente, tem lucro = valor total)
+    total_sold, total_saida, lucro = db.execute(sales_with_cost(
+        func.count(Sale.id),
+        func.coalesce(func.sum(Sale.valor), 0),
+        func.coalesce(func.sum(Sale.valor - func.coalesce(Purchase.valor, 0)), 0)
+    ).where(
         Sale.user_id == current_user.id
-    ).scalar() or 0
-    
-    # Calcular lucro real
-    sales = db.query(Sale).filter(Sale.user_id == current_user.id).all()
-    lucro = 0
-    for sale in sales:
-        tire = sale.tire
-        if tire.purchase_id and tire.purchase:
-            # Venda com custo: lucro = venda - custo
-            lucro += sale.valor - tire.purchase.valor
-        else:
-            # Venda sem custo (pneu adicionado manualmente): lucro = valor total
-            lucro += sale.valor
+    )).one()
     
     # Pneus por condição
     condition_data = []
@@ -77,18 +70,20 @@ def get_dashboard_data(
             "value": count
         })
     
-    # Top 5 marcas mais vendidas
+    # Top 5 marcas mais vendidas (agrupadas pelo id do catálogo). Como em
+    # sales_with_cost, o pneu removido depois da venda continua contando
     top_brands = []
     brands = db.query(
-        Tire.marca,
+        Tire.brand_id,
         func.count(Sale.id).label('count')
     ).join(Sale, Sale.tire_id == Tire.id).filter(
-        Sale.user_id == current_user.id
-    ).group_by(Tire.marca).order_by(func.count(Sale.id).desc()).limit(5).all()
+        Sale.user_id == current_user.id,
+        Sale.deleted_at.is_(None)
+    ).group_by(Tire.brand_id).order_by(func.count(Sale.id).desc()).limit(5).execution_options(include_deleted=True).all()
     
-    for marca, count in brands:
+    for brand_id, count in brands:
         top_brands.append({
-            "name": marca,
+            "name": catalog.brand_name(brand_id),
             "value": count
         })
     
@@ -144,4 +139,89 @@ def get_dashboard_data(
         "condition_data": condition_data,
         "top_brands": top_brands,
         "monthly_data": monthly_data
-    }
\ No newline at end of file
+    }
+
+# Faixas de idade do estoque (dias desde a entrada)
+AGING_BUCKETS = [("0-30", 30), ("31-90", 90), ("91-180", 180)]
+AGING_OLDEST = "180+"
+
+def days_between(db: Session, start, end):
+    """Expressão SQL com a diferença em dias entre duas datas"""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start) / 86400
+    elif dialect == "sqlite":
+        return func.julianday(end) - func.julianday(start)
+    return func.timestampdiff(text("SECOND"), start, end) / 86400
+
+@router.get("/inventory-aging", dependencies=ANALYTICS_LIMITS)
+def get_inventory_aging(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Idade do estoque parado e tempo médio até a venda por marca/medida/condição"""
+    cached = user_cache.get(current_user.id, "inventory-aging")
+    if cached is not None:
+        return cached
+    
+    # Estoque não vendido por faixa de idade (limites calculados aqui para o
+    # filtro usar o índice (user_id, vendido, data_entrada))
+    now = datetime.utcnow()
+    bucket = case(
+        *[(Tire.data_entrada >= now - timedelta(days=days), name) for name, days in AGING_BUCKETS],
+        else_=AGING_OLDEST
+    ).label("bucket")
+    aging_rows = db.query(bucket, func.count(Tire.id)).filter(
+        Tire.user_id == current_user.id,
+        Tire.vendido == False,
+        Tire.data_entrada.isnot(None)
+    ).group_by(bucket).all()
+    
+    counts = dict(aging_rows)
+    aging = [
+        {"bucket": name, "count": counts.get(name, 0)}
+        for name in [name for name, _ in AGING_BUCKETS] + [AGING_OLDEST]
+    ]
+    
+    # Tempo médio até a venda dos pneus vendidos
+    days = days_between(db, Tire.data_entrada, Tire.data_saida)
+    sold_rows = db.query(
+        Tire.brand_id,
+        Tire.size_id,
+        Tire.condicao,
+        func.avg(days),
+        func.count(Tire.id)
+    ).filter(
+        Tire.user_id == current_user.id,
+        Tire.vendido == True,
+        Tire.data_entrada.isnot(None),
+        Tire.data_saida.isnot(None)
+    ).group_by(Tire.brand_id, Tire.size_id, Tire.condicao).order_by(func.count(Tire.id).desc()).all()
+    
+    days_to_sell = []
+    for brand_id, size_id, condicao, avg_days, count in sold_rows:
+        medida, aro = catalog.size_values(size_id)
+        days_to_sell.append({
+            "marca": catalog.brand_name(brand_id),
+            "medida": medida,
+            "aro": aro,
+            "condicao": condicao,
+            "avg_days": round(float(avg_days or 0), 1),
+            "count": count
+        })
+    
+    result = {
+        "aging": aging,
+        "days_to_sell": days_to_sell
+    }
+    user_cache.set(current_user.id, "inventory-aging", result)
+    return result
+
+@router.get("/stream")
+async def stream_dashboard(user_id: str = Depends(get_stream_user_id)):
+    """Server-sent events com as mudanças do usuário (deltas das estatísticas)"""
+    return StreamingResponse(
+        event_stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
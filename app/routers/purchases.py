@@ -2,48 +2,68 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import datetime
 
 from ..database import get_db
 from ..models import Purchase, Tire, User
 from ..schemas import PurchaseCreate, PurchaseResponse
-from ..auth import get_current_user
+from ..auth import get_current_user, get_read_db
+from ..ratelimit import WRITE_LIMITS
+from ..idempotency import idempotency, IdempotentRequest
+from ..events import hub
+from ..catalog import catalog
+from .. import month_index
 
 router = APIRouter(prefix="/purchases", tags=["purchases"])
 
-@router.post("/", response_model=PurchaseResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=PurchaseResponse, status_code=status.HTTP_201_CREATED, dependencies=WRITE_LIMITS)
 def create_purchase(
     purchase: PurchaseCreate,
+    idem: IdempotentRequest = Depends(idempotency("purchases.create")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Registra uma compra E adiciona o pneu ao estoque"""
+    if idem.replay is not None:
+        return idem.replay
     
-    # 1. Criar a compra
-    new_purchase = Purchase(**purchase.dict(), user_id=current_user.id)
+    # 1. Criar a compra (marca/medida/aro canônicos do catálogo)
+    values = catalog.resolve(purchase.dict())
+    new_purchase = Purchase(**values, user_id=current_user.id)
     db.add(new_purchase)
     db.flush()  # Gera o ID sem commitar
     
     # 2. Criar o pneu no estoque vinculado à compra
     new_tire = Tire(
-        marca=purchase.marca,
-        medida=purchase.medida,
-        aro=purchase.aro,
+        marca=new_purchase.marca,
+        medida=new_purchase.medida,
+        aro=new_purchase.aro,
+        brand_id=new_purchase.brand_id,
+        size_id=new_purchase.size_id,
         condicao=purchase.condicao,
         detalhes=purchase.detalhes,
         user_id=current_user.id,
         purchase_id=new_purchase.id  # Vincula à compra
     )
     db.add(new_tire)
+    month_index.track(db, current_user.id, new_purchase.data, purchases=1)
     
+    # A resposta guardada entra no mesmo commit da compra
+    body = idem.save(db, status.HTTP_201_CREATED, PurchaseResponse.model_validate(new_purchase))
     db.commit()
-    db.refresh(new_purchase)
-    return new_purchase
+    
+    hub.publish(current_user.id, {
+        "type": "purchase_created",
+        "purchase": {"id": new_purchase.id, "valor": new_purchase.valor, "data": new_purchase.data.isoformat()},
+        "delta": {"total_tires": 1, "total_purchased": 1, "total_entrada": new_purchase.valor}
+    })
+    return body
 
 @router.get("/", response_model=List[PurchaseResponse])
 def list_purchases(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     purchases = db.query(Purchase).filter(
@@ -65,7 +85,7 @@ def get_purchase(
         raise HTTPException(status_code=404, detail="Compra não encontrada")
     return purchase
 
-@router.delete("/{purchase_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{purchase_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=WRITE_LIMITS)
 def delete_purchase(
     purchase_id: str,
     db: Session = Depends(get_db),
@@ -81,9 +101,24 @@ def delete_purchase(
     if not purchase:
         raise HTTPException(status_code=404, detail="Compra não encontrada")
     
-    if purchase.tire and not purchase.tire.vendido:
-        db.delete(purchase.tire)
+    # Remoção lógica: a compra e o pneu ficam marcados com deleted_at
+    now = datetime.utcnow()
+    tire = purchase.tire
+    tire_removed = bool(tire and not tire.vendido and tire.deleted_at is None)
+    if tire_removed:
+        tire.deleted_at = now
     
-    db.delete(purchase)
+    month_index.track(db, current_user.id, purchase.data, purchases=-1)
+    purchase.deleted_at = now
     db.commit()
+    
+    hub.publish(current_user.id, {
+        "type": "purchase_deleted",
+        "purchase_id": purchase_id,
+        "delta": {
+            "total_tires": -1 if tire_removed else 0,
+            "total_purchased": -1,
+            "total_entrada": -purchase.valor
+        }
+    })
     return None
\ No newline at end of file
@@ -1,13 +1,18 @@
 # app/routers/reports.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
+from sqlalchemy import func, text, select
 from typing import List
-from datetime import datetime
+from datetime import date, datetime, timedelta
+import json
 
 from ..database import get_db
-from ..models import Sale, Purchase, Tire, User
-from ..auth import get_current_user
+from ..models import Sale, Purchase, Tire, User, ReportJob, JobStatusEnum, sales_archive, tires_archive
+from ..schemas import ReportJobCreate, ReportJobResponse
+from ..auth import get_current_user, get_read_db
+from ..ratelimit import ANALYTICS_LIMITS
+from ..config import JOB_MAX_MONTHS
+from .. import jobs, month_index
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -27,74 +32,22 @@ def get_month_format(db: Session):
 
 @router.get("/months")
 def get_available_months(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Retorna lista de meses com vendas ou compras"""
-    
-    dialect = db.bind.dialect.name
-    
-    # Meses com vendas
-    if dialect == "postgresql":
-        sales_months = db.query(
-            func.to_char(Sale.data, 'YYYY-MM').label('month')
-        ).filter(
-            Sale.user_id == current_user.id
-        ).distinct().all()
-        
-        purchases_months = db.query(
-            func.to_char(Purchase.data, 'YYYY-MM').label('month')
-        ).filter(
-            Purchase.user_id == current_user.id
-        ).distinct().all()
-    
-    elif dialect == "sqlite":
-        sales_months = db.query(
-            func.strftime('%Y-%m', Sale.data).label('month')
-        ).filter(
-            Sale.user_id == current_user.id
-        ).distinct().all()
-        
-        purchases_months = db.query(
-            func.strftime('%Y-%m', Purchase.data).label('month')
-        ).filter(
-            Purchase.user_id == current_user.id
-        ).distinct().all()
-    
-    else:
-        # MySQL
-        sales_months = db.query(
-            func.date_format(Sale.data, '%Y-%m').label('month')
-        ).filter(
-            Sale.user_id == current_user.id
-        ).distinct().all()
-        
-        purchases_months = db.query(
-            func.date_format(Purchase.data, '%Y-%m').label('month')
-        ).filter(
-            Purchase.user_id == current_user.id
-        ).distinct().all()
-    
-    # Combinar e ordenar
-    all_months = set()
-    for (month,) in sales_months:
-        all_months.add(month)
-    for (month,) in purchases_months:
-        all_months.add(month)
-    
+    # Lido do índice user_months, mantido pelas rotas de venda e compra
     return {
-        "months": sorted(list(all_months), reverse=True)
+        "months": month_index.list_months(db, current_user.id)
     }
 
-@router.get("/monthly/{month}")
-def get_monthly_report(
-    month: str,  # Formato: YYYY-MM
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Retorna relatório detalhado de um mês específico"""
-    
-    # Validar formato do mês
+# Anos aceitos: o intervalo do mês (month_range) termina no início do mês
+# seguinte, que precisa caber em datetime (anos 1..9999)
+MIN_YEAR = 1
+MAX_YEAR = 9998
+
+def parse_month(month: str, min_year: int = MIN_YEAR):
+    """Valida um mês no formato YYYY-MM e retorna (ano, mês)"""
     try:
         year, mon = month.split("-")
         year = int(year)
@@ -103,110 +56,368 @@ def get_monthly_report(
             raise ValueError
     except:
         raise HTTPException(status_code=400, detail="Formato de mês inválido. Use YYYY-MM")
+    if year < min_year or year > MAX_YEAR:
+        raise HTTPException(status_code=400, detail=f"Ano deve estar entre {min_year} e {MAX_YEAR}")
+    return year, mon
+
+@router.get("/monthly/{month}", dependencies=ANALYTICS_LIMITS)
+def get_monthly_report(
+    month: str,  # Formato: YYYY-MM
+    include_archive: bool = Query(False, description="Incluir vendas arquivadas"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Retorna relatório detalhado de um mês específico"""
+    year, mon = parse_month(month)
+    return build_monthly_report(db, current_user.id, year, mon, include_archive)
+
+def archived_sales(user_id: str, first: datetime, last: datetime, *columns):
+    """SELECT sobre as vendas arquivadas do período, com pneu e custo da compra"""
+    sale, tire, purchase = sales_archive.c, tires_archive.c, Purchase.__table__.c
+    return select(*columns).select_from(
+        sales_archive.join(tires_archive, tire.id == sale.tire_id).outerjoin(
+            Purchase.__table__, purchase.id == tire.purchase_id
+        )
+    ).where(
+        sale.user_id == user_id,
+        sale.deleted_at.is_(None),
+        sale.data >= first,
+        sale.data < last
+    )
+
+def sales_with_cost(*columns):
+    """SELECT de vendas com o pneu e a compra dele (custo)
+
+    Como nos relacionamentos, pneu ou compra removidos depois da venda
+    continuam valendo; só as vendas removidas ficam de fora.
+    """
+    return select(*columns).select_from(Sale).join(
+        Tire, Sale.tire_id == Tire.id
+    ).outerjoin(
+        Purchase, Tire.purchase_id == Purchase.id
+    ).where(Sale.deleted_at.is_(None)).execution_options(include_deleted=True)
+
+# Linhas lidas do banco por vez nos relatórios (não materializa o mês inteiro)
+REPORT_BATCH_SIZE = 1000
+
+def sale_items(rows):
+    """(id, data, valor, marca, medida, aro, custo) -> itens de venda do relatório"""
+    for sale_id, data, valor, marca, medida, aro, custo in rows:
+        yield {
+            "id": sale_id,
+            "data": data.isoformat(),
+            "marca": marca,
+            "medida": medida,
+            "aro": aro,
+            "valor": valor,
+            "custo": custo,
+            # Venda sem compra vinculada (pneu adicionado manualmente): lucro = valor
+            "lucro": valor - custo if custo is not None else valor
+        }
+
+def purchase_items(rows):
+    """(id, data, marca, medida, aro, valor) -> itens de compra do relatório"""
+    for purchase_id, data, marca, medida, aro, valor in rows:
+        yield {
+            "id": purchase_id,
+            "data": data.isoformat(),
+            "marca": marca,
+            "medida": medida,
+            "aro": aro,
+            "valor": valor
+        }
+
+def build_monthly_report(db: Session, user_id: str, year: int, mon: int, include_archive: bool = False) -> dict:
+    """Monta o relatório de um mês (usado pela rota e pelos jobs em background)
+
+    Lê só as colunas usadas, em tuplas (sem entidades ORM nem identity map),
+    em lotes de REPORT_BATCH_SIZE, e soma os totais na mesma passada.
+    """
     
-    dialect = db.bind.dialect.name
+    # Intervalo [início do mês, início do mês seguinte): usa o índice
+    # (user_id, data) e, com particionamento, lê só a partição do mês
+    first, last = month_range((year, mon), (year, mon))
     
-    # Buscar vendas do mês (usando funções específicas do banco)
-    if dialect == "postgresql":
-        # PostgreSQL: usar extract
-        sales = db.query(Sale).filter(
-            Sale.user_id == current_user.id,
-            func.extract('year', Sale.data) == year,
-            func.extract('month', Sale.data) == mon
-        ).order_by(Sale.data.desc()).all()
-        
-        purchases = db.query(Purchase).filter(
-            Purchase.user_id == current_user.id,
-            func.extract('year', Purchase.data) == year,
-            func.extract('month', Purchase.data) == mon
-        ).order_by(Purchase.data.desc()).all()
+    sales_query = sales_with_cost(
+        Sale.id, Sale.data, Sale.valor, Tire.marca, Tire.medida, Tire.aro, Purchase.valor
+    ).where(
+        Sale.user_id == user_id,
+        Sale.data >= first,
+        Sale.data < last
+    ).order_by(Sale.data.desc())
     
-    elif dialect == "sqlite":
-        # SQLite: usar strftime
-        sales = db.query(Sale).filter(
-            Sale.user_id == current_user.id,
-            func.strftime('%Y', Sale.data) == str(year),
-            func.strftime('%m', Sale.data) == f"{mon:02d}"
-        ).order_by(Sale.data.desc()).all()
-        
-        purchases = db.query(Purchase).filter(
-            Purchase.user_id == current_user.id,
-            func.strftime('%Y', Purchase.data) == str(year),
-            func.strftime('%m', Purchase.data) == f"{mon:02d}"
-        ).order_by(Purchase.data.desc()).all()
+    sources = [db.execute(sales_query.execution_options(yield_per=REPORT_BATCH_SIZE))]
+    if include_archive:
+        sale, tire = sales_archive.c, tires_archive.c
+        sources.append(db.execute(archived_sales(
+            user_id, first, last,
+            sale.id, sale.data, sale.valor, tire.marca, tire.medida, tire.aro, Purchase.__table__.c.valor
+        ).execution_options(yield_per=REPORT_BATCH_SIZE)))
     
-    else:
-        # MySQL: usar YEAR() e MONTH()
-        sales = db.query(Sale).filter(
-            Sale.user_id == current_user.id,
-            func.year(Sale.data) == year,
-            func.month(Sale.data) == mon
-        ).order_by(Sale.data.desc()).all()
-        
-        purchases = db.query(Purchase).filter(
-            Purchase.user_id == current_user.id,
-            func.year(Purchase.data) == year,
-            func.month(Purchase.data) == mon
-        ).order_by(Purchase.data.desc()).all()
-    
-    # Calcular totais
-    total_vendas = sum(sale.valor for sale in sales)
-    total_compras = sum(purchase.valor for purchase in purchases)
-    
-    # Calcular lucro real
+    sales_data = []
+    total_vendas = 0
     lucro = 0
-    for sale in sales:
-        tire = sale.tire
-        if tire.purchase_id and tire.purchase:
-            # Venda com custo
-            lucro += sale.valor - tire.purchase.valor
-        else:
-            # Venda sem custo (pneu adicionado manualmente)
-            lucro += sale.valor
+    for source in sources:
+        for item in sale_items(source):
+            total_vendas += item["valor"]
+            lucro += item["lucro"]
+            sales_data.append(item)
+    if include_archive:
+        sales_data.sort(key=lambda item: item["data"], reverse=True)
     
-    # Montar dados de vendas
-    sales_data = []
-    for sale in sales:
-        tire = sale.tire
-        custo = None
-        lucro_individual = None
-        
-        if tire.purchase_id and tire.purchase:
-            custo = tire.purchase.valor
-            lucro_individual = sale.valor - custo
-        else:
-            lucro_individual = sale.valor
-        
-        sales_data.append({
-            "id": sale.id,
-            "data": sale.data.isoformat(),
-            "marca": tire.marca,
-            "medida": tire.medida,
-            "aro": tire.aro,
-            "valor": sale.valor,
-            "custo": custo,
-            "lucro": lucro_individual
-        })
-    
-    # Montar dados de compras
-    purchases_data = []
-    for purchase in purchases:
-        purchases_data.append({
-            "id": purchase.id,
-            "data": purchase.data.isoformat(),
-            "marca": purchase.marca,
-            "medida": purchase.medida,
-            "aro": purchase.aro,
-            "valor": purchase.valor
-        })
+    purchases_query = select(
+        Purchase.id, Purchase.data, Purchase.marca, Purchase.medida, Purchase.aro, Purchase.valor
+    ).where(
+        Purchase.user_id == user_id,
+        Purchase.data >= first,
+        Purchase.data < last
+    ).order_by(Purchase.data.desc())
+    
+    purchases_data = list(purchase_items(
+        db.execute(purchases_query.execution_options(yield_per=REPORT_BATCH_SIZE))
+    ))
+    total_compras = sum(item["valor"] for item in purchases_data)
     
     return {
-        "month": month,
+        "month": f"{year}-{mon:02d}",
         "total_vendas": float(total_vendas),
         "total_compras": float(total_compras),
         "lucro": float(lucro),
-        "sales_count": len(sales),
-        "purchases_count": len(purchases),
+        "sales_count": len(sales_data),
+        "purchases_count": len(purchases_data),
         "sales": sales_data,
         "purchases": purchases_data
-    }
\ No newline at end of file
+    }
+
+# ========== RELATÓRIO POR PERÍODO ==========
+# Formato do período de agrupamento em cada banco
+BUCKET_FORMATS = {
+    "postgresql": {"month": "YYYY-MM", "day": "YYYY-MM-DD"},
+    "sqlite": {"month": "%Y-%m", "day": "%Y-%m-%d"},
+    "mysql": {"month": "%Y-%m", "day": "%Y-%m-%d"},
+}
+
+def bucket_expr(db: Session, column, group: str):
+    """Expressão SQL que converte a data no rótulo do período (mês/dia)
+
+    Semanas viram a data da segunda-feira que as inicia, igual em todos os
+    bancos (os formatos de semana de cada um numeram de jeitos diferentes);
+    o rótulo ISO é montado em Python por week_label.
+    """
+    dialect = db.bind.dialect.name
+    if group == "week":
+        if dialect == "postgresql":
+            return func.to_char(func.date_trunc("week", column), "YYYY-MM-DD")
+        elif dialect == "sqlite":
+            # Próximo domingo (ou o próprio dia) menos 6 dias = segunda-feira
+            return func.strftime("%Y-%m-%d", column, "weekday 0", "-6 days")
+        return func.date_format(func.subdate(column, func.weekday(column)), "%Y-%m-%d")
+    fmt = BUCKET_FORMATS.get(dialect, BUCKET_FORMATS["mysql"])[group]
+    if dialect == "postgresql":
+        return func.to_char(column, fmt)
+    elif dialect == "sqlite":
+        return func.strftime(fmt, column)
+    return func.date_format(column, fmt)
+
+def week_label(monday: str) -> str:
+    """Rótulo ISO da semana que começa em `monday` (2024-12-30 -> 2025-W01)"""
+    iso = date.fromisoformat(monday).isocalendar()
+    return f"{iso.year}-W{iso.week:02d}"
+
+def previous_year_period(period: str, group: str) -> str:
+    """Período equivalente no ano anterior (comparação ano a ano)"""
+    if group == "month":
+        return f"{int(period[:4]) - 1:04d}{period[4:]}"
+    day = date.fromisoformat(period)
+    if group == "week":
+        # 52 semanas antes: mesma semana ISO e sempre uma segunda-feira
+        return (day - timedelta(days=364)).isoformat()
+    try:
+        return day.replace(year=day.year - 1).isoformat()
+    except ValueError:
+        # 29/02 é comparado com 28/02 do ano anterior
+        return day.replace(year=day.year - 1, day=28).isoformat()
+
+def range_periods(first: datetime, last: datetime, group: str) -> list:
+    """Períodos do intervalo [first, last), em ordem, rotulados como em bucket_expr"""
+    day = first.date()
+    if group == "week":
+        day -= timedelta(days=day.weekday())
+    periods = []
+    while day < last.date():
+        if group == "month":
+            periods.append(f"{day.year:04d}-{day.month:02d}")
+            day = (day + timedelta(days=32)).replace(day=1)
+        else:
+            periods.append(day.isoformat())
+            day += timedelta(days=7 if group == "week" else 1)
+    return periods
+
+def month_range(start, end, years_back: int = 0):
+    """Intervalo [início, fim) cobrindo os meses start..end (inclusivo)"""
+    (start_year, start_mon), (end_year, end_mon) = start, end
+    first = datetime(start_year - years_back, start_mon, 1)
+    if end_mon == 12:
+        last = datetime(end_year - years_back + 1, 1, 1)
+    else:
+        last = datetime(end_year - years_back, end_mon + 1, 1)
+    return first, last
+
+def aggregate_range(db: Session, user_id: str, first: datetime, last: datetime, group: str, include_archive: bool = False) -> dict:
+    """Totais por período com uma consulta agrupada por tabela"""
+    buckets = {}
+    
+    # Vendas: total, quantidade e lucro (venda sem compra vinculada tem custo 0)
+    sale_bucket = bucket_expr(db, Sale.data, group).label("period")
+    sales = db.execute(sales_with_cost(
+        sale_bucket,
+        func.sum(Sale.valor),
+        func.count(Sale.id),
+        func.sum(Sale.valor - func.coalesce(Purchase.valor, 0))
+    ).where(
+        Sale.user_id == user_id,
+        Sale.data >= first,
+        Sale.data < last
+    ).group_by(sale_bucket)).all()
+    
+    if include_archive:
+        sale = sales_archive.c
+        archived_bucket = bucket_expr(db, sale.data, group).label("period")
+        query = archived_sales(
+            user_id, first, last,
+            archived_bucket,
+            func.sum(sale.valor),
+            func.count(sale.id),
+            func.sum(sale.valor - func.coalesce(Purchase.__table__.c.valor, 0))
+        ).group_by(archived_bucket)
+        sales = sales + db.execute(query).all()
+    
+    empty = {"total_vendas": 0.0, "total_compras": 0.0, "lucro": 0.0, "sales_count": 0, "purchases_count": 0}
+    for period, total, count, lucro in sales:
+        bucket = buckets.setdefault(period, dict(empty))
+        bucket["total_vendas"] += float(total or 0)
+        bucket["lucro"] += float(lucro or 0)
+        bucket["sales_count"] += count
+    
+    # Compras
+    purchase_bucket = bucket_expr(db, Purchase.data, group).label("period")
+    purchases = db.query(
+        purchase_bucket,
+        func.sum(Purchase.valor),
+        func.count(Purchase.id)
+    ).filter(
+        Purchase.user_id == user_id,
+        Purchase.data >= first,
+        Purchase.data < last
+    ).group_by(purchase_bucket).all()
+    
+    for period, total, count in purchases:
+        bucket = buckets.setdefault(period, dict(empty))
+        bucket["total_compras"] = float(total or 0)
+        bucket["purchases_count"] = count
+    
+    return buckets
+
+@router.get("/range", dependencies=ANALYTICS_LIMITS)
+def get_range_report(
+    start: str = Query(..., description="Mês inicial (YYYY-MM)"),
+    end: str = Query(..., description="Mês final (YYYY-MM), inclusivo"),
+    group: str = Query("month", pattern="^(month|week|day)$", description="Agrupar por month, week ou day"),
+    yoy: bool = Query(False, description="Incluir o mesmo período do ano anterior"),
+    include_archive: bool = Query(False, description="Incluir vendas arquivadas"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Relatório de vários meses agrupado por mês/semana/dia, em uma passada"""
+    # Com yoy o ano anterior também precisa caber em datetime
+    start_month = parse_month(start, min_year=MIN_YEAR + 1 if yoy else MIN_YEAR)
+    end_month = parse_month(end)
+    if start_month > end_month:
+        raise HTTPException(status_code=400, detail="Mês inicial deve ser anterior ao final")
+    
+    first, last = month_range(start_month, end_month)
+    buckets = aggregate_range(db, current_user.id, first, last, group, include_archive)
+    
+    previous = {}
+    if yoy:
+        previous = aggregate_range(
+            db, current_user.id, *month_range(start_month, end_month, years_back=1), group, include_archive
+        )
+    
+    empty = {"total_vendas": 0.0, "total_compras": 0.0, "lucro": 0.0, "sales_count": 0, "purchases_count": 0}
+    totals = dict(empty)
+    data = []
+    # Só períodos do intervalo pedido; o ano anterior entra como "anterior"
+    for period in range_periods(first, last, group):
+        values = buckets.get(period)
+        before = previous.get(previous_year_period(period, group)) if yoy else None
+        if values is None and before is None:
+            continue
+        values = values or empty
+        for key in totals:
+            totals[key] += values[key]
+        row = {"period": week_label(period) if group == "week" else period, **values}
+        if yoy:
+            row["anterior"] = before or empty
+        data.append(row)
+    
+    return {
+        "start": f"{start_month[0]}-{start_month[1]:02d}",
+        "end": f"{end_month[0]}-{end_month[1]:02d}",
+        "group": group,
+        **totals,
+        "buckets": data
+    }
+
+# ========== JOBS DE RELATÓRIO ==========
+@router.post("/jobs", response_model=ReportJobResponse, status_code=status.HTTP_202_ACCEPTED, dependencies=ANALYTICS_LIMITS)
+def create_report_job(
+    job: ReportJobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Agenda um relatório de vários meses para execução em background"""
+    start = parse_month(job.start)
+    end = parse_month(job.end)
+    if start > end:
+        raise HTTPException(status_code=400, detail="Mês inicial deve ser anterior ao final")
+    
+    months = (end[0] - start[0]) * 12 + end[1] - start[1] + 1
+    if months > JOB_MAX_MONTHS:
+        raise HTTPException(status_code=400, detail=f"Período máximo de {JOB_MAX_MONTHS} meses")
+    
+    return jobs.submit_report_job(db, current_user.id, start, end)
+
+def get_user_job(db: Session, job_id: str, user_id: str) -> ReportJob:
+    job = db.query(ReportJob).filter(
+        ReportJob.id == job_id,
+        ReportJob.user_id == user_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+def get_report_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Status e progresso de um job de relatório"""
+    job = get_user_job(db, job_id, current_user.id)
+    jobs.resubmit_if_stale(job)
+    return job
+
+@router.get("/jobs/{job_id}/result")
+def get_report_job_result(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Resultado de um job concluído"""
+    job = get_user_job(db, job_id, current_user.id)
+    if job.status == JobStatusEnum.failed:
+        raise HTTPException(status_code=500, detail=f"Job falhou: {job.error}")
+    if job.status != JobStatusEnum.done:
+        raise HTTPException(status_code=409, detail="Job ainda em processamento")
+    return json.loads(job.result)
@@ -7,17 +7,24 @@ from datetime import datetime
 from ..database import get_db
 from ..models import Sale, Tire, User
 from ..schemas import SaleCreate, SaleResponse
-from ..auth import get_current_user
+from ..auth import get_current_user, get_read_db
+from ..ratelimit import WRITE_LIMITS
+from ..idempotency import idempotency, IdempotentRequest
+from ..events import hub
+from .. import month_index
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
-@router.post("/", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=SaleResponse, status_code=status.HTTP_201_CREATED, dependencies=WRITE_LIMITS)
 def create_sale(
     sale: SaleCreate,
+    idem: IdempotentRequest = Depends(idempotency("sales.create")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Registra uma venda e marca o pneu como vendido"""
+    if idem.replay is not None:
+        return idem.replay
     
     tire = db.query(Tire).filter(
         Tire.id == sale.tire_id,
@@ -30,18 +37,20 @@ def create_sale(
     if tire.vendido:
         raise HTTPException(status_code=400, detail="Pneu já foi vendido")
     
+    now = datetime.utcnow()
     new_sale = Sale(
         tire_id=sale.tire_id,
         valor=sale.valor,
+        data=now,
         user_id=current_user.id
     )
     
     tire.vendido = True
-    tire.data_saida = datetime.utcnow()
+    tire.data_saida = now
     
     db.add(new_sale)
-    db.commit()
-    db.refresh(new_sale)
+    month_index.track(db, current_user.id, now, sales=1)
+    db.flush()
     
     custo = None
     lucro = None
@@ -49,7 +58,8 @@ def create_sale(
         custo = tire.purchase.valor
         lucro = sale.valor - custo
     
-    return {
+    # A resposta guardada entra no mesmo commit da venda
+    body = idem.save(db, status.HTTP_201_CREATED, {
         "id": new_sale.id,
         "tire_id": new_sale.tire_id,
         "valor": new_sale.valor,
@@ -60,13 +70,26 @@ def create_sale(
         "condicao": tire.condicao,
         "custo": custo,
         "lucro": lucro
-    }
+    })
+    db.commit()
+    
+    hub.publish(current_user.id, {
+        "type": "sale_created",
+        "sale": {"id": new_sale.id, "tire_id": new_sale.tire_id, "valor": new_sale.valor, "data": new_sale.data.isoformat()},
+        "delta": {
+            "total_tires": -1,
+            "total_sold": 1,
+            "total_saida": new_sale.valor,
+            "lucro": lucro if lucro is not None else new_sale.valor
+        }
+    })
+    return body
 
 @router.get("/", response_model=List[SaleResponse])
 def list_sales(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     sales = db.query(Sale).filter(
@@ -134,7 +157,7 @@ def get_sale(
     }
     
     
-@router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=WRITE_LIMITS)
 def delete_sale(
     sale_id: str,
     db: Session = Depends(get_db),
@@ -151,13 +174,32 @@ def delete_sale(
             detail="Venda não encontrada"
         )
     
-    tire = db.query(Tire).filter(Tire.id == sale.tire_id).first()
+    tire = db.query(Tire).filter(
+        Tire.id == sale.tire_id,
+        Tire.user_id == current_user.id
+    ).first()
     
+    lucro = sale.valor
     if tire:
         tire.vendido = False
         tire.data_saida = None
+        if tire.purchase_id and tire.purchase:
+            lucro = sale.valor - tire.purchase.valor
     
-    db.delete(sale)
+    # Remoção lógica: a venda fica registrada com deleted_at
+    month_index.track(db, current_user.id, sale.data, sales=-1)
+    sale.deleted_at = datetime.utcnow()
     db.commit()
     
+    hub.publish(current_user.id, {
+        "type": "sale_deleted",
+        "sale_id": sale_id,
+        "delta": {
+            "total_tires": 1 if tire else 0,
+            "total_sold": -1,
+            "total_saida": -sale.valor,
+            "lucro": -lucro
+        }
+    })
+    
     return None
\ No newline at end of file
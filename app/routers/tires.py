@@ -1,26 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from sqlalchemy import update, insert, func, select
 from typing import List, Optional
 from datetime import datetime
+import csv
+import io
 
 from ..database import get_db
-from ..models import Tire, User
-from ..schemas import TireCreate, TireUpdate, TireResponse, TireCondition
-from ..auth import get_current_user
+from ..models import Tire, Size, User
+from ..schemas import (
+    TireCreate, TireUpdate, TireResponse, TireCondition,
+    TireBulkUpdate, TireBulkDelete, TireBulkResult, TireImportResult
+)
+from ..config import BULK_MAX_IDS, IMPORT_CHUNK_SIZE, IMPORT_MAX_ERRORS
+from ..auth import get_current_user, get_read_db
+from ..ratelimit import WRITE_LIMITS
+from ..idempotency import idempotency, IdempotentRequest
+from ..events import hub
+from ..catalog import catalog, normalize_size
 
 router = APIRouter(prefix="/tires", tags=["tires"])
 
-@router.post("/", response_model=TireResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=TireResponse, status_code=status.HTTP_201_CREATED, dependencies=WRITE_LIMITS)
 def create_tire(
     tire: TireCreate,
+    idem: IdempotentRequest = Depends(idempotency("tires.create")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    new_tire = Tire(**tire.dict(), user_id=current_user.id)
+    if idem.replay is not None:
+        return idem.replay
+    
+    new_tire = Tire(**catalog.resolve(tire.dict()), user_id=current_user.id)
     db.add(new_tire)
+    db.flush()
+    
+    # A resposta guardada entra no mesmo commit do pneu
+    body = idem.save(db, status.HTTP_201_CREATED, TireResponse.model_validate(new_tire))
     db.commit()
-    db.refresh(new_tire)
-    return new_tire
+    
+    hub.publish(current_user.id, {
+        "type": "tire_created",
+        "tire_id": new_tire.id,
+        "delta": {"total_tires": 1}
+    })
+    return body
+
+@router.post("/import", response_model=TireImportResult, dependencies=WRITE_LIMITS)
+def import_tires(
+    file: UploadFile = File(..., description="CSV com colunas marca, medida, aro, condicao e detalhes (opcional)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Importa o estoque a partir de um CSV, em lotes (um INSERT e um commit por lote)"""
+    # O upload já está em arquivo temporário; o CSV é lido linha a linha
+    text_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text_file)
+        missing = {"marca", "medida", "aro", "condicao"} - set(reader.fieldnames or [])
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Colunas ausentes no CSV: {', '.join(sorted(missing))}")
+        
+        imported = 0
+        failed = 0
+        errors = []
+        chunk = []
+        
+        def flush():
+            nonlocal imported
+            db.execute(insert(Tire), chunk)
+            db.commit()
+            imported += len(chunk)
+            chunk.clear()
+        
+        try:
+            for line, row in enumerate(reader, start=2):  # Linha 1 é o cabeçalho
+                try:
+                    tire = TireCreate(**{key: value.strip() or None for key, value in row.items() if key and value is not None})
+                    values = catalog.resolve(tire.dict())
+                except ValidationError as exc:
+                    failed += 1
+                    if len(errors) < IMPORT_MAX_ERRORS:
+                        error = exc.errors()[0]
+                        field = ".".join(str(part) for part in error["loc"])
+                        errors.append({"line": line, "error": f"{field}: {error['msg']}"})
+                    continue
+                except HTTPException as exc:
+                    failed += 1
+                    if len(errors) < IMPORT_MAX_ERRORS:
+                        errors.append({"line": line, "error": exc.detail})
+                    continue
+                
+                chunk.append({**values, "user_id": current_user.id})
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    flush()
+            if chunk:
+                flush()
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(status_code=400, detail=f"CSV inválido após {imported} linhas importadas: {exc}")
+        finally:
+            if imported:
+                hub.publish(current_user.id, {
+                    "type": "tires_imported",
+                    "count": imported,
+                    "delta": {"total_tires": imported}
+                })
+    finally:
+        # Não deixa o TextIOWrapper fechar o arquivo do upload
+        text_file.detach()
+    
+    return {"imported": imported, "failed": failed, "errors": errors}
 
 @router.get("/available", response_model=List[TireResponse])  # ← MOVER ANTES DO /{tire_id}
 def list_available_tires(
@@ -29,39 +119,139 @@ def list_available_tires(
     condicao: Optional[TireCondition] = Query(None, description="Filtrar por condição"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Listar apenas pneus disponíveis (não vendidos) com filtros"""
     
     query = db.query(Tire).filter(
         Tire.user_id == current_user.id,
-        Tire.vendido == False  # Apenas não vendidos
+        Tire.vendido == False,  # Apenas não vendidos
+        *tire_filters(marca, medida, condicao)
     )
     
-    # Aplicar filtros
+    tires = query.offset(skip).limit(limit).all()
+    return tires
+
+def tire_filters(marca: Optional[str], medida: Optional[str], condicao: Optional[TireCondition]) -> list:
+    """Condições SQL dos filtros de estoque ("todas" = sem filtro)"""
+    filters = []
     if marca and marca.lower() != "todas":
-        query = query.filter(Tire.marca.ilike(f"%{marca}%"))
+        filters.append(Tire.marca.ilike(f"%{marca}%"))
     
     if medida and medida.lower() != "todas":
-        query = query.filter(Tire.medida == medida)
+        filters.append(Tire.medida == normalize_size(medida, "")[0])
     
     if condicao and str(condicao).lower() != "todas":
-        query = query.filter(Tire.condicao == condicao)
+        filters.append(Tire.condicao == condicao)
+    return filters
+
+def bulk_selection(selection: TireBulkDelete, user_id: str) -> list:
+    """Condições SQL da seleção em lote (IDs e/ou filtros), sempre do usuário"""
+    if not selection.ids and selection.filter is None:
+        raise HTTPException(status_code=400, detail="Informe ids ou filter")
+    if selection.ids and len(selection.ids) > BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BULK_MAX_IDS} ids por requisição")
     
-    tires = query.offset(skip).limit(limit).all()
-    return tires
+    criteria = [Tire.user_id == user_id]
+    if selection.ids:
+        criteria.append(Tire.id.in_(selection.ids))
+    if selection.filter is not None:
+        filters = tire_filters(selection.filter.marca, selection.filter.medida, selection.filter.condicao)
+        if not filters and not selection.ids:
+            # {"filter": {}} ou só "todas" selecionaria o estoque inteiro
+            raise HTTPException(status_code=400, detail="Filtro vazio: informe marca, medida ou condição")
+        criteria.extend(filters)
+    return criteria
+
+def count_sold(db: Session, criteria: list) -> int:
+    return db.query(func.count(Tire.id)).filter(*criteria, Tire.vendido == True).scalar()
 
 @router.get("/", response_model=List[TireResponse])
 def list_tires(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     tires = db.query(Tire).filter(Tire.user_id == current_user.id).offset(skip).limit(limit).all()
     return tires
 
+@router.patch("/bulk", response_model=TireBulkResult, dependencies=WRITE_LIMITS)
+def bulk_update_tires(
+    bulk: TireBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Atualiza vários pneus do estoque com um único UPDATE (vendidos são recusados)"""
+    changes = bulk.changes.dict(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="Nenhuma alteração informada")
+    nulls = [field for field, value in changes.items() if value is None and not Tire.__table__.c[field].nullable]
+    if nulls:
+        raise HTTPException(status_code=400, detail=f"Campos não podem ser nulos: {', '.join(nulls)}")
+    
+    criteria = bulk_selection(bulk, current_user.id)
+    if "marca" in changes:
+        changes.update(catalog.resolve({"marca": changes["marca"]}))
+    if "medida" in changes and "aro" in changes:
+        changes.update(catalog.resolve({"medida": changes["medida"], "aro": changes["aro"]}))
+    elif "medida" in changes or "aro" in changes:
+        # Só medida ou só aro: a combinação nova depende do valor de cada pneu
+        changes.update(bulk_size_changes(db, criteria, changes))
+    
+    skipped_sold = count_sold(db, criteria)
+    result = db.execute(
+        update(Tire).where(*criteria, Tire.vendido == False).values(**changes),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    
+    hub.publish(current_user.id, {
+        "type": "tires_bulk_updated",
+        "count": result.rowcount,
+        "delta": {"total_tires": 0}
+    })
+    return {"affected": result.rowcount, "skipped_sold": skipped_sold}
+
+def bulk_size_changes(db: Session, criteria: list, changes: dict) -> dict:
+    """Medida ou aro canônicos e size_id (subconsulta) para um UPDATE em lote
+    que altera só um dos dois; as combinações resultantes entram no catálogo"""
+    field = "medida" if "medida" in changes else "aro"
+    value = normalize_size(changes[field], "")[0]
+    combos = db.query(Tire.medida, Tire.aro).filter(*criteria, Tire.vendido == False).distinct().all()
+    for medida, aro in combos:
+        catalog.size(**{"medida": medida, "aro": aro, field: value})
+    
+    # No SET, Tire.medida/Tire.aro são os valores antigos de cada linha
+    size_id = select(Size.id).where(
+        Size.medida == (value if field == "medida" else Tire.medida),
+        Size.aro == (value if field == "aro" else Tire.aro)
+    ).scalar_subquery()
+    return {field: value, "size_id": size_id}
+
+@router.delete("/bulk", response_model=TireBulkResult, dependencies=WRITE_LIMITS)
+def bulk_delete_tires(
+    bulk: TireBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Remove (logicamente) vários pneus do estoque com um único UPDATE (vendidos são recusados)"""
+    criteria = bulk_selection(bulk, current_user.id)
+    skipped_sold = count_sold(db, criteria)
+    result = db.execute(
+        update(Tire).where(*criteria, Tire.vendido == False).values(deleted_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    
+    hub.publish(current_user.id, {
+        "type": "tires_bulk_deleted",
+        "count": result.rowcount,
+        "delta": {"total_tires": -result.rowcount}
+    })
+    return {"affected": result.rowcount, "skipped_sold": skipped_sold}
+
 @router.get("/{tire_id}", response_model=TireResponse)
 def get_tire(
     tire_id: str,
@@ -73,7 +263,7 @@ def get_tire(
         raise HTTPException(status_code=404, detail="Pneu não encontrado")
     return tire
 
-@router.put("/{tire_id}", response_model=TireResponse)
+@router.put("/{tire_id}", response_model=TireResponse, dependencies=WRITE_LIMITS)
 def update_tire(
     tire_id: str,
     tire_update: TireUpdate,
@@ -84,14 +274,21 @@ def update_tire(
     if not tire:
         raise HTTPException(status_code=404, detail="Pneu não encontrado")
     
-    for key, value in tire_update.dict(exclude_unset=True).items():
+    was_available = not tire.vendido
+    for key, value in catalog.resolve(tire_update.dict(exclude_unset=True), current=tire).items():
         setattr(tire, key, value)
     
     db.commit()
     db.refresh(tire)
+    
+    hub.publish(current_user.id, {
+        "type": "tire_updated",
+        "tire_id": tire.id,
+        "delta": {"total_tires": int(not tire.vendido) - int(was_available)}
+    })
     return tire
 
-@router.delete("/{tire_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{tire_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=WRITE_LIMITS)
 def delete_tire(
     tire_id: str,
     db: Session = Depends(get_db),
@@ -101,6 +298,13 @@ def delete_tire(
     if not tire:
         raise HTTPException(status_code=404, detail="Pneu não encontrado")
     
-    db.delete(tire)
+    was_available = not tire.vendido
+    tire.deleted_at = datetime.utcnow()
     db.commit()
+    
+    hub.publish(current_user.id, {
+        "type": "tire_deleted",
+        "tire_id": tire_id,
+        "delta": {"total_tires": -1 if was_available else 0}
+    })
     return None
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 
 class TireCondition(str, Enum):
@@ -50,6 +50,39 @@ class TireUpdate(BaseModel):
     vendido: Optional[bool] = None
     data_saida: Optional[datetime] = None
 
+class TireFilter(BaseModel):
+    marca: Optional[str] = None
+    medida: Optional[str] = None
+    condicao: Optional[TireCondition] = None
+
+class TireBulkChanges(BaseModel):
+    marca: Optional[str] = None
+    medida: Optional[str] = None
+    aro: Optional[str] = None
+    condicao: Optional[TireCondition] = None
+    detalhes: Optional[str] = None
+
+# Seleção por lista de IDs ou pelos mesmos filtros de /tires/available
+class TireBulkDelete(BaseModel):
+    ids: Optional[List[str]] = None
+    filter: Optional[TireFilter] = None
+
+class TireBulkUpdate(TireBulkDelete):
+    changes: TireBulkChanges
+
+class TireBulkResult(BaseModel):
+    affected: int       # Pneus alterados/removidos
+    skipped_sold: int   # Pneus selecionados mas já vendidos (recusados)
+
+class TireImportError(BaseModel):
+    line: int
+    error: str
+
+class TireImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[TireImportError]  # Primeiros erros (limitado por IMPORT_MAX_ERRORS)
+
 class TireResponse(TireBase):
     id: str
     data_entrada: datetime
@@ -121,4 +154,33 @@ class SaleSimpleResponse(BaseModel):
     lucro: Optional[float] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# ========== CATALOG SCHEMAS ==========
+class CatalogSize(BaseModel):
+    medida: str
+    aro: str
+
+# ========== REPORT JOB SCHEMAS ==========
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class ReportJobCreate(BaseModel):
+    start: str = Field(description="Mês inicial (YYYY-MM)")
+    end: str = Field(description="Mês final (YYYY-MM), inclusivo")
+
+class ReportJobResponse(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    progress: int
+    total: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,91 @@
+# app/startup.py
+"""Medição do custo de startup (imports e inicialização)
+
+Uso: python -m app.startup
+Mostra os módulos mais caros de importar (via -X importtime) e o tempo de
+cada etapa de inicialização do worker, comparando com STARTUP_TARGET_MS.
+"""
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from .config import STARTUP_TARGET_MS
+
+class StartupProfile:
+    """Acumula o tempo de cada etapa do startup"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.steps = []
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, (time.perf_counter() - start) * 1000))
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def report(self) -> dict:
+        total = self.total_ms()
+        return {
+            "total_ms": round(total, 1),
+            "target_ms": STARTUP_TARGET_MS,
+            "within_target": total <= STARTUP_TARGET_MS,
+            "steps": [
+                {"name": name, "ms": round(ms, 1)}
+                for name, ms in sorted(self.steps, key=lambda s: s[1], reverse=True)
+            ],
+        }
+
+# Perfil do processo atual (iniciado no import de app.main)
+profile = StartupProfile()
+
+def importtime_report(module: str = "app.main", top: int = 25) -> list:
+    """Importa o módulo em um subprocesso com -X importtime e retorna os mais caros"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # Formato: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            rows.append({
+                "module": name.rstrip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+def print_report(report: dict):
+    status = "✅" if report["within_target"] else "⚠️ "
+    print(f"{status} Startup em {report['total_ms']} ms (meta: {report['target_ms']} ms)")
+    for step in report["steps"]:
+        print(f"   {step['ms']:>8.1f} ms  {step['name']}")
+
+def main():
+    print("Imports mais caros (cumulativo):")
+    for row in importtime_report():
+        print(f"   {row['cumulative_ms']:>8.1f} ms  {row['module'].strip()}")
+
+    # Executa o mesmo startup de um worker: import + lifespan
+    from .main import app, startup
+
+    startup(app)
+    print()
+    print_report(app.state.startup_report)
+
+if __name__ == "__main__":
+    main()
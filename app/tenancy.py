@@ -0,0 +1,89 @@
+# app/tenancy.py
+"""Escopo por tenant (usuário) das sessões
+
+Depois de scope(db, user_id), toda consulta, UPDATE e DELETE ORM sobre
+pneus, vendas e compras recebe `user_id = :tenant` (with_loader_criteria,
+no mesmo SQL, sem consultas extras), e objetos novos não podem ser gravados
+para outro usuário. Os filtros escritos nas rotas continuam valendo; o
+escopo garante o que alguma rota esquecer.
+
+TENANT_DATABASE_ROUTER permite mover lojas grandes para um banco próprio:
+pneus, vendas e compras do tenant passam a usar a engine retornada, enquanto
+usuários, catálogo, jobs, índice de meses e idempotência ficam no banco
+principal. O banco dedicado precisa ter o schema e o catálogo (brands/sizes)
+copiados do principal.
+"""
+import importlib
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from .config import TENANT_DATABASE_ROUTER
+from .database import engine_options
+from .models import TenantScopedMixin
+
+_router = None
+_engines = {}  # URL -> engine
+_lock = threading.Lock()
+
+def load_router():
+    """Função tenant -> URL configurada em TENANT_DATABASE_ROUTER"""
+    global _router
+    if _router is None and TENANT_DATABASE_ROUTER:
+        module_name, function_name = TENANT_DATABASE_ROUTER.split(":")
+        _router = getattr(importlib.import_module(module_name), function_name)
+    return _router
+
+def set_router(router):
+    global _router
+    _router = router
+
+def tenant_engine(tenant_id: str):
+    """Engine dedicada do tenant, ou None se ele usa o banco principal"""
+    router = load_router()
+    url = router(tenant_id) if router is not None else None
+    if not url:
+        return None
+    if url not in _engines:
+        with _lock:
+            if url not in _engines:
+                _engines[url] = create_engine(url, **engine_options(url))
+    return _engines[url]
+
+def scope(db: Session, tenant_id: str) -> Session:
+    """Restringe a sessão aos dados do tenant (e ao banco dele, se houver)"""
+    db.info["tenant_id"] = tenant_id
+    engine = tenant_engine(tenant_id)
+    if engine is not None:
+        db.info["tenant_engine"] = engine
+    return db
+
+@event.listens_for(Session, "do_orm_execute")
+def apply_tenant_criteria(execute_state):
+    """Acrescenta user_id = tenant em consultas/UPDATE/DELETE ORM da sessão"""
+    tenant_id = execute_state.session.info.get("tenant_id")
+    if tenant_id is None or execute_state.is_column_load:
+        return
+    if execute_state.is_select or execute_state.is_update or execute_state.is_delete:
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                TenantScopedMixin,
+                lambda cls: cls.user_id == tenant_id,
+                include_aliases=True
+            )
+        )
+
+@event.listens_for(Session, "before_flush")
+def check_tenant_writes(session, flush_context, instances):
+    """Objetos novos herdam o tenant da sessão; gravar para outro é erro"""
+    tenant_id = session.info.get("tenant_id")
+    if tenant_id is None:
+        return
+    for obj in session.new:
+        if not isinstance(obj, TenantScopedMixin):
+            continue
+        if obj.user_id is None:
+            obj.user_id = tenant_id
+        elif obj.user_id != tenant_id:
+            raise PermissionError(f"Gravação de {type(obj).__name__} para outro tenant")
@@ -0,0 +1,65 @@
+# gunicorn.conf.py
+# Servidor de produção: gunicorn gerenciando workers uvicorn
+# O master não importa nada de app/: módulos carregados aqui ficariam velhos
+# depois de um HUP, e os workers novos os herdariam no fork
+import os
+import subprocess
+import sys
+
+def web_workers() -> int:
+    """Número de workers: WEB_CONCURRENCY ou o menor entre CPU e orçamento do banco"""
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(int(os.getenv("WEB_CONCURRENCY")), 1)
+    # Mesmos padrões de app/config.py
+    pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+    max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    max_connections = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+    by_cpu = (os.cpu_count() or 1) * 2 + 1
+    by_db = max_connections // (pool_size + max_overflow)
+    return max(min(by_cpu, by_db), 1)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = web_workers()
+
+# Sem preload cada worker importa o app sozinho, e o HUP recarrega o código
+# (com preload o código só muda reiniciando o master)
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+# Reload/shutdown graciosos: requisições em andamento têm até 30s para terminar
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+# Reciclagem de workers (contra fragmentação de memória) é opcional: cada
+# reciclagem derruba as conexões SSE do worker e interrompe os jobs de
+# relatório dele (devolvidos a pending no shutdown, ver app/jobs.py)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# DDL (tabelas, partições, colunas e índices) uma única vez, num processo
+# separado e antes dos workers subirem em paralelo. O processo lê o código do
+# disco a cada execução, então um HUP com models novos aplica as mudanças
+CREATE_SCHEMA = "from app.database import create_schema, get_engine; create_schema(get_engine())"
+
+def create_schema(server):
+    subprocess.run([sys.executable, "-c", CREATE_SCHEMA], check=True)
+    # Herdado pelos workers: init_db só aquece o pool
+    os.environ["DB_SCHEMA_READY"] = "1"
+
+def on_starting(server):
+    create_schema(server)
+
+def on_reload(server):
+    try:
+        create_schema(server)
+    except subprocess.CalledProcessError:
+        # Os workers novos criam o que falta sozinhos (DDL com checkfirst)
+        server.log.error("Falha ao atualizar o schema no reload; os workers vão tentar")
+        os.environ.pop("DB_SCHEMA_READY", None)
+
+def post_fork(server, worker):
+    # A engine é criada no lifespan de cada worker; com preload, descarta o
+    # pool herdado do master para não compartilhar sockets entre processos
+    from app.database import dispose_engine
+    dispose_engine()
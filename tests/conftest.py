@@ -0,0 +1,93 @@
+# tests/conftest.py
+import os
+import tempfile
+import time
+import uuid
+
+# Banco SQLite descartável: precisa estar no ambiente antes de importar o app
+_tmpdir = tempfile.mkdtemp(prefix="vipneus-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.pop("PROFILING_TOKEN", None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.main import app
+from app.database import get_engine
+
+# Benchmarks (marcados com @pytest.mark.bench) são lentos: só rodam com BENCH=1
+RUN_BENCH = os.getenv("BENCH") == "1"
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "bench: benchmark lento, roda só com BENCH=1")
+
+def pytest_collection_modifyitems(config, items):
+    if RUN_BENCH:
+        return
+    skip = pytest.mark.skip(reason="benchmark: rode com BENCH=1")
+    for item in items:
+        if "bench" in item.keywords:
+            item.add_marker(skip)
+
+def insert_rows(table, rows, chunk_size: int = 10_000) -> int:
+    """Insere as linhas (iterável de dicts) em lotes via Core; retorna quantas"""
+    count = 0
+    chunk = []
+    with get_engine().begin() as conn:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                conn.execute(insert(table), chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            conn.execute(insert(table), chunk)
+            count += len(chunk)
+    return count
+
+def timed(call, repeat: int = 3) -> float:
+    """Menor tempo (ms) entre `repeat` execuções de call()"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 2)
+
+def report(name: str, **values):
+    """Imprime o resultado de um benchmark (veja com pytest -s)"""
+    print(f"\n[bench] {name}: " + ", ".join(f"{key}={value}" for key, value in values.items()))
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def engine(client):
+    return get_engine()
+
+@pytest.fixture
+def make_user(client):
+    """Registra um usuário novo e retorna (user_id, headers de autenticação)"""
+    def factory():
+        email = f"{uuid.uuid4().hex[:12]}@teste.com"
+        user = client.post("/auth/register", json={"email": email, "password": "senha"}).json()
+        token = client.post("/auth/login", json={"email": email, "password": "senha"}).json()["access_token"]
+        return user["id"], {"Authorization": f"Bearer {token}"}
+    return factory
+
+@pytest.fixture
+def purchase(client):
+    """Registra uma compra (e o pneu dela) para o usuário dos headers"""
+    def factory(headers, valor=100.0, marca="Pirelli"):
+        response = client.post("/purchases/", json={
+            "valor": valor, "marca": marca, "medida": "205/55", "aro": "R16", "condicao": "novo"
+        }, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return factory
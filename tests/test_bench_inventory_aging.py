@@ -0,0 +1,58 @@
+# tests/test_bench_inventory_aging.py
+"""Latência de /dashboard/inventory-aging com BENCH_TIRES pneus (padrão 500 mil)
+
+BENCH=1 python -m pytest -s tests/test_bench_inventory_aging.py
+"""
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.cache import user_cache
+from app.catalog import catalog
+from app.models import Tire
+
+from .conftest import insert_rows, report, timed
+
+TIRES = int(os.getenv("BENCH_TIRES", "500000"))
+# Orçamento da consulta sem cache (SQLite local; no Postgres fica abaixo disso)
+BUDGET_MS = float(os.getenv("BENCH_AGING_BUDGET_MS", "2000"))
+
+def tire_rows(user_id: str, count: int):
+    rng = random.Random(42)
+    brands = [catalog.brand(name) for name in ("Pirelli", "Michelin", "Goodyear", "Bridgestone", "Continental")]
+    sizes = [catalog.size(medida, aro) for medida, aro in (("205/55", "R16"), ("175/70", "R13"), ("225/45", "R17"))]
+    now = datetime.utcnow()
+    for _ in range(count):
+        brand_id, marca = rng.choice(brands)
+        size_id, medida, aro = rng.choice(sizes)
+        entrada = now - timedelta(days=rng.uniform(0, 400))
+        sold = rng.random() < 0.3
+        yield {
+            "id": str(uuid.uuid4()), "user_id": user_id,
+            "marca": marca, "brand_id": brand_id, "medida": medida, "aro": aro, "size_id": size_id,
+            "condicao": rng.choice(["novo", "seminovo", "recapado", "meia_vida"]),
+            "data_entrada": entrada,
+            "data_saida": entrada + timedelta(days=rng.uniform(1, 120)) if sold else None,
+            "vendido": sold,
+        }
+
+@pytest.mark.bench
+def test_inventory_aging_within_budget(client, make_user):
+    user_id, headers = make_user()
+    insert_rows(Tire.__table__, tire_rows(user_id, TIRES))
+
+    def uncached():
+        user_cache.invalidate_user(user_id)
+        response = client.get("/dashboard/inventory-aging", headers=headers)
+        assert response.status_code == 200, response.text
+
+    cold_ms = timed(uncached)
+    cached_ms = timed(lambda: client.get("/dashboard/inventory-aging", headers=headers))
+    total = sum(bucket["count"] for bucket in client.get("/dashboard/inventory-aging", headers=headers).json()["aging"])
+
+    report("inventory-aging", tires=TIRES, unsold=total, cold_ms=cold_ms, cached_ms=cached_ms, budget_ms=BUDGET_MS)
+    assert cold_ms < BUDGET_MS
+    assert cached_ms < cold_ms
@@ -0,0 +1,59 @@
+# tests/test_bench_report_months.py
+"""/reports/months (índice user_months) contra a varredura DISTINCT antiga,
+para um usuário com BENCH_MONTHS_ROWS compras (padrão 1 milhão)
+
+BENCH=1 python -m pytest -s tests/test_bench_report_months.py
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, union
+
+from app import month_index
+from app.database import SessionLocal
+from app.models import Purchase, Sale
+
+from .conftest import insert_rows, report, timed
+
+ROWS = int(os.getenv("BENCH_MONTHS_ROWS", "1000000"))
+# Dez anos de compras, espalhadas por minuto
+SPREAD = timedelta(days=3650)
+
+def purchase_rows(user_id: str, count: int):
+    start = datetime(2015, 1, 1)
+    step = SPREAD / count
+    for index in range(count):
+        yield {
+            "id": str(uuid.uuid4()), "user_id": user_id, "data": start + step * index,
+            "valor": 100.0, "marca": "Pirelli", "medida": "205/55", "aro": "R16", "condicao": "novo"
+        }
+
+def distinct_scan(user_id: str) -> list:
+    """Consulta de antes do índice: DISTINCT do mês sobre vendas e compras (SQLite)"""
+    with SessionLocal() as db:
+        months = union(*[
+            select(func.strftime("%Y-%m", model.data)).where(model.user_id == user_id)
+            for model in (Sale, Purchase)
+        ])
+        return sorted(db.execute(months).scalars().all(), reverse=True)
+
+@pytest.mark.bench
+def test_months_index_vs_distinct_scan(client, make_user):
+    user_id, headers = make_user()
+    insert_rows(Purchase.__table__, purchase_rows(user_id, ROWS))
+    with SessionLocal() as db:
+        month_index.rebuild(db)
+
+    def indexed():
+        return client.get("/reports/months", headers=headers).json()["months"]
+
+    months = indexed()
+    assert months == distinct_scan(user_id)
+    index_ms = timed(indexed)
+    scan_ms = timed(lambda: distinct_scan(user_id), repeat=1)
+
+    report("reports/months", rows=ROWS, months=len(months), index_ms=index_ms, distinct_scan_ms=scan_ms)
+    assert index_ms < 50
+    assert index_ms * 10 < scan_ms
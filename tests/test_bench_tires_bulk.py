@@ -0,0 +1,73 @@
+# tests/test_bench_tires_bulk.py
+"""PATCH/DELETE /tires/bulk contra as rotas por item, com BENCH_BULK_TIRES pneus
+
+BENCH=1 python -m pytest -s tests/test_bench_tires_bulk.py
+"""
+import os
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app import ratelimit
+from app.models import Tire
+
+from .conftest import insert_rows, report
+
+TIRES = int(os.getenv("BENCH_BULK_TIRES", "300"))
+
+class NoLimit(ratelimit.RateLimitBackend):
+    def hit(self, key, rate, burst):
+        return 0
+
+@pytest.fixture
+def stock(client, make_user, monkeypatch):
+    """Usuário com TIRES pneus no estoque; retorna (headers, ids)"""
+    # As rotas por item passariam do burst de escrita
+    monkeypatch.setattr(ratelimit, "backend", NoLimit())
+    user_id, headers = make_user()
+    ids = [str(uuid.uuid4()) for _ in range(TIRES)]
+    insert_rows(Tire.__table__, ({
+        "id": tire_id, "user_id": user_id, "marca": "Pirelli", "medida": "205/55", "aro": "R16",
+        "condicao": "novo", "data_entrada": datetime.utcnow(), "vendido": False
+    } for tire_id in ids))
+    return headers, ids
+
+def elapsed_ms(call) -> float:
+    start = time.perf_counter()
+    call()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+@pytest.mark.bench
+def test_bulk_update_vs_per_item(client, stock):
+    headers, ids = stock
+
+    def per_item():
+        for tire_id in ids:
+            assert client.put(f"/tires/{tire_id}", json={"detalhes": "por item"}, headers=headers).status_code == 200
+
+    def bulk():
+        response = client.patch("/tires/bulk", json={"ids": ids, "changes": {"detalhes": "em lote"}}, headers=headers)
+        assert response.json()["affected"] == len(ids)
+
+    per_item_ms, bulk_ms = elapsed_ms(per_item), elapsed_ms(bulk)
+    report("tires bulk update", tires=len(ids), per_item_ms=per_item_ms, bulk_ms=bulk_ms, speedup=round(per_item_ms / bulk_ms, 1))
+    assert bulk_ms * 10 < per_item_ms
+
+@pytest.mark.bench
+def test_bulk_delete_vs_per_item(client, stock):
+    headers, ids = stock
+    half = len(ids) // 2
+
+    def per_item():
+        for tire_id in ids[:half]:
+            assert client.delete(f"/tires/{tire_id}", headers=headers).status_code == 204
+
+    def bulk():
+        response = client.request("DELETE", "/tires/bulk", json={"ids": ids[half:]}, headers=headers)
+        assert response.json()["affected"] == len(ids) - half
+
+    per_item_ms, bulk_ms = elapsed_ms(per_item), elapsed_ms(bulk)
+    report("tires bulk delete", tires=half, per_item_ms=per_item_ms, bulk_ms=bulk_ms, speedup=round(per_item_ms / bulk_ms, 1))
+    assert bulk_ms * 10 < per_item_ms
@@ -0,0 +1,48 @@
+# tests/test_bench_tires_import.py
+"""Linhas/segundo de POST /tires/import com um CSV de BENCH_IMPORT_ROWS linhas
+
+BENCH=1 python -m pytest -s tests/test_bench_tires_import.py
+"""
+import csv
+import os
+import resource
+import time
+
+import pytest
+
+from .conftest import report
+
+ROWS = int(os.getenv("BENCH_IMPORT_ROWS", "1000000"))
+
+def write_csv(path, rows: int):
+    brands = ["Pirelli", "Michelin", "Goodyear", "Bridgestone"]
+    sizes = [("205/55", "R16"), ("175/70", "R13"), ("225/45", "R17")]
+    conditions = ["novo", "seminovo", "recapado", "meia-vida"]
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["marca", "medida", "aro", "condicao", "detalhes"])
+        for index in range(rows):
+            medida, aro = sizes[index % len(sizes)]
+            writer.writerow([brands[index % len(brands)], medida, aro, conditions[index % len(conditions)], f"lote {index // 1000}"])
+
+@pytest.mark.bench
+def test_import_rows_per_second(client, make_user, tmp_path):
+    _, headers = make_user()
+    path = tmp_path / "estoque.csv"
+    write_csv(path, ROWS)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        response = client.post("/tires/import", files={"file": ("estoque.csv", file, "text/csv")}, headers=headers)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": ROWS, "failed": 0, "errors": []}
+    report(
+        "tires import", rows=ROWS, seconds=round(elapsed, 2), rows_per_sec=round(ROWS / elapsed),
+        csv_mb=round(path.stat().st_size / 2**20, 1),
+        # Inclui o corpo multipart montado pelo TestClient (em memória)
+        peak_rss_growth_mb=round((rss_after - rss_before) / 1024, 1)
+    )
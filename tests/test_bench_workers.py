@@ -0,0 +1,103 @@
+# tests/test_bench_workers.py
+"""Carga no servidor de produção (gunicorn.conf.py) com 1 e N workers
+
+BENCH=1 python -m pytest -s tests/test_bench_workers.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from .conftest import report
+
+ROOT = Path(__file__).resolve().parent.parent
+DURATION_SECONDS = float(os.getenv("BENCH_DURATION", "5"))
+CLIENT_THREADS = int(os.getenv("BENCH_CLIENTS", "16"))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, database_url: str):
+    port = free_port()
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": "bench-secret",
+        # Sem limite de taxa atrapalhando a medição
+        "WRITE_BURST": "100000", "ANALYTICS_BURST": "100000",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py", "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/docs").status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise AssertionError(f"gunicorn com {workers} workers não subiu")
+
+def authenticate(base_url: str) -> dict:
+    email = f"bench-{time.monotonic_ns()}@teste.com"
+    httpx.post(f"{base_url}/auth/register", json={"email": email, "password": "senha"})
+    token = httpx.post(f"{base_url}/auth/login", json={"email": email, "password": "senha"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(20):
+        httpx.post(f"{base_url}/purchases/", json={
+            "valor": 100, "marca": "Pirelli", "medida": "205/55", "aro": "R16", "condicao": "novo"
+        }, headers=headers)
+    return headers
+
+def throughput(base_url: str, headers: dict) -> float:
+    """Requisições/segundo em GET /tires/ com CLIENT_THREADS clientes"""
+    done = [0] * CLIENT_THREADS
+    errors = []
+    stop = time.monotonic() + DURATION_SECONDS
+
+    def client(index):
+        with httpx.Client(base_url=base_url, headers=headers) as http:
+            while time.monotonic() < stop:
+                response = http.get("/tires/")
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+                done[index] += 1
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(CLIENT_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, f"Respostas com erro: {errors[:10]}"
+    return sum(done) / DURATION_SECONDS
+
+@pytest.mark.bench
+def test_throughput_scales_with_workers(tmp_path):
+    cpus = os.cpu_count() or 1
+    many = max(min(cpus, 4), 2)
+    results = {}
+    for workers in (1, many):
+        process, base_url = start_server(workers, f"sqlite:///{tmp_path}/bench-{workers}.db")
+        try:
+            results[workers] = throughput(base_url, authenticate(base_url))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report("workers", cpus=cpus, **{f"rps_{workers}w": round(rps, 1) for workers, rps in results.items()})
+    if cpus < 2:
+        pytest.skip(f"Só {cpus} CPU: sem como medir escala ({results})")
+    assert results[many] >= 1.3 * results[1]
@@ -0,0 +1,13 @@
+# tests/test_dashboard.py
+
+def test_sold_tire_deleted_later_still_counts_in_top_brands(client, make_user, purchase):
+    _, headers = make_user()
+    purchase(headers, marca="Pirelli")
+    tire_id = client.get("/tires/", headers=headers).json()[0]["id"]
+    assert client.post("/sales/", json={"tire_id": tire_id, "valor": 150}, headers=headers).status_code == 201
+    assert client.delete(f"/tires/{tire_id}", headers=headers).status_code == 204
+
+    dashboard = client.get("/dashboard/", headers=headers).json()
+
+    assert dashboard["stats"]["total_sold"] == 1
+    assert dashboard["top_brands"] == [{"name": "Pirelli", "value": 1}]
@@ -0,0 +1,120 @@
+# tests/test_events.py
+import asyncio
+
+from app import events
+from app.events import EventHub, event_stream, hub
+
+from .conftest import report
+
+def test_publish_fans_out_to_every_connection_of_the_user():
+    async def scenario():
+        local_hub = EventHub()
+        first = local_hub.subscribe("ana")
+        second = local_hub.subscribe("ana")
+        other = local_hub.subscribe("bruno")
+
+        local_hub.publish("ana", {"type": "sale_created"})
+        await asyncio.sleep(0)  # call_soon_threadsafe entrega no próximo ciclo
+
+        assert first.queue.get_nowait() == second.queue.get_nowait() == {"type": "sale_created"}
+        assert other.queue.empty()
+
+    asyncio.run(scenario())
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def scenario():
+        local_hub = EventHub()
+        subscriber = local_hub.subscribe("ana")
+        for _ in range(subscriber.queue.maxsize + 1):
+            local_hub.publish("ana", {"type": "sale_created"})
+        await asyncio.sleep(0)
+
+        assert subscriber.queue.qsize() == 1
+        assert subscriber.queue.get_nowait() == {"type": "resync"}
+
+    asyncio.run(scenario())
+
+def test_stream_subscribes_only_while_the_body_is_sent():
+    async def scenario():
+        stream = event_stream("carla")
+        # Resposta criada mas corpo nunca iniciado (cliente desconectou): sem inscrição
+        assert "carla" not in hub._subscribers
+
+        assert await stream.__anext__() == "retry: 5000\n\n"
+        assert len(hub._subscribers["carla"]) == 1
+
+        hub.publish("carla", {"type": "sale_created", "delta": {"total_sales": 1}})
+        chunk = await stream.__anext__()
+        assert chunk.startswith("event: sale_created\n")
+
+        await stream.aclose()
+        assert "carla" not in hub._subscribers
+
+    asyncio.run(scenario())
+
+def test_stream_sends_periodic_resync(monkeypatch):
+    monkeypatch.setattr(events, "SSE_RESYNC_SECONDS", 0.05)
+    monkeypatch.setattr(events, "SSE_HEARTBEAT_SECONDS", 10)
+
+    async def scenario():
+        stream = event_stream("davi")
+        await stream.__anext__()
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        await stream.aclose()
+        assert chunk.startswith("event: resync\n")
+
+    asyncio.run(scenario())
+
+def test_failing_listener_does_not_block_delivery():
+    async def scenario():
+        local_hub = EventHub()
+        calls = []
+
+        def broken(user_id, event):
+            raise RuntimeError("banco fora do ar")
+
+        local_hub.add_listener(broken)
+        local_hub.add_listener(lambda user_id, event: calls.append(event))
+        subscriber = local_hub.subscribe("ana")
+
+        local_hub.publish("ana", {"type": "sale_created"})
+        await asyncio.sleep(0)
+
+        assert calls == [{"type": "sale_created"}]
+        assert subscriber.queue.get_nowait() == {"type": "sale_created"}
+
+    asyncio.run(scenario())
+
+def test_committed_write_succeeds_when_last_write_update_fails(client, make_user, purchase, monkeypatch):
+    def fail(user_id):
+        raise RuntimeError("UPDATE users falhou")
+
+    monkeypatch.setattr(events, "mark_user_write", fail)
+    _, headers = make_user()
+
+    purchase(headers)  # 201, não 500
+    assert len(client.get("/purchases/", headers=headers).json()) == 1
+
+FANOUT_SUBSCRIBERS = 500
+FANOUT_BUDGET_SECONDS = 0.5
+
+def test_fanout_reaches_hundreds_of_subscribers_within_budget():
+    async def scenario():
+        local_hub = EventHub()
+        subscribers = [local_hub.subscribe("ana") for _ in range(FANOUT_SUBSCRIBERS)]
+        loop = asyncio.get_running_loop()
+
+        # As rotas publicam da thread do threadpool, como aqui
+        start = loop.time()
+        await loop.run_in_executor(None, local_hub.publish, "ana", {"type": "sale_created"})
+        received = await asyncio.wait_for(
+            asyncio.gather(*(subscriber.queue.get() for subscriber in subscribers)),
+            timeout=FANOUT_BUDGET_SECONDS
+        )
+        elapsed = loop.time() - start
+
+        assert received == [{"type": "sale_created"}] * FANOUT_SUBSCRIBERS
+        assert elapsed < FANOUT_BUDGET_SECONDS
+        report("fan-out", subscribers=FANOUT_SUBSCRIBERS, ms=round(elapsed * 1000, 2))
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+# tests/test_idempotency.py
+import threading
+import time
+import uuid
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import Purchase
+
+def count_purchases(user_id):
+    with SessionLocal() as db:
+        return db.execute(select(func.count(Purchase.id)).where(Purchase.user_id == user_id)).scalar()
+
+def test_retry_replays_stored_response(client, make_user):
+    user_id, headers = make_user()
+    headers = {**headers, "Idempotency-Key": uuid.uuid4().hex}
+    payload = {"valor": 120, "marca": "Pirelli", "medida": "205/55", "aro": "R16", "condicao": "novo"}
+
+    first = client.post("/purchases/", json=payload, headers=headers)
+    second = client.post("/purchases/", json=payload, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert count_purchases(user_id) == 1
+
+def test_same_key_with_different_body_is_rejected(client, make_user):
+    user_id, headers = make_user()
+    headers = {**headers, "Idempotency-Key": uuid.uuid4().hex}
+    payload = {"valor": 120, "marca": "Pirelli", "medida": "205/55", "aro": "R16", "condicao": "novo"}
+
+    assert client.post("/purchases/", json=payload, headers=headers).status_code == 201
+    response = client.post("/purchases/", json={**payload, "valor": 999}, headers=headers)
+
+    assert response.status_code == 422
+    assert count_purchases(user_id) == 1
+
+def test_failed_request_releases_key(client, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": uuid.uuid4().hex}
+
+    missing = client.post("/sales/", json={"tire_id": "nao-existe", "valor": 10}, headers=headers)
+    retry = client.post("/sales/", json={"tire_id": "nao-existe", "valor": 10}, headers=headers)
+
+    assert missing.status_code == retry.status_code == 404
+    assert "Idempotent-Replayed" not in retry.headers
+
+def test_parallel_retries_create_once_without_exhausting_pool(client, make_user, engine):
+    user_id, headers = make_user()
+    headers = {**headers, "Idempotency-Key": uuid.uuid4().hex}
+    payload = {"valor": 150, "marca": "Michelin", "medida": "175/70", "aro": "R14", "condicao": "novo"}
+    results = []
+    max_checked_out = 0
+    done = threading.Event()
+
+    def watch_pool():
+        nonlocal max_checked_out
+        while not done.is_set():
+            max_checked_out = max(max_checked_out, engine.pool.checkedout())
+            time.sleep(0.005)
+
+    def send():
+        response = client.post("/purchases/", json=payload, headers=headers)
+        results.append((response.status_code, response.json()))
+
+    watcher = threading.Thread(target=watch_pool)
+    watcher.start()
+    started = time.monotonic()
+    threads = [threading.Thread(target=send) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    watcher.join()
+
+    assert [status for status, _ in results] == [201] * 8
+    assert all(body == results[0][1] for _, body in results)
+    assert count_purchases(user_id) == 1
+    # Quem espera não segura conexão: só a requisição dona e as tentativas curtas
+    assert max_checked_out <= 8
+    assert time.monotonic() - started < 5
@@ -0,0 +1,57 @@
+# tests/test_jobs.py
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app import jobs
+from app.database import SessionLocal
+from app.models import JobStatusEnum, Purchase, ReportJob
+
+def wait_for_job(client, headers, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/reports/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} não terminou em {timeout}s")
+
+def test_report_job_sums_each_month(client, make_user, purchase):
+    user_id, headers = make_user()
+    for valor in (100.0, 50.0, 25.0):
+        purchase(headers, valor=valor)
+    with SessionLocal() as db:
+        db.execute(update(Purchase).where(Purchase.user_id == user_id, Purchase.valor < 60).values(data=datetime(2024, 3, 10)))
+        db.execute(update(Purchase).where(Purchase.user_id == user_id, Purchase.valor >= 60).values(data=datetime(2024, 1, 5)))
+        db.commit()
+
+    response = client.post("/reports/jobs", json={"start": "2024-01", "end": "2024-03"}, headers=headers)
+    assert response.status_code == 202, response.text
+    job = wait_for_job(client, headers, response.json()["id"])
+    assert job["status"] == "done", job["error"]
+
+    result = client.get(f"/reports/jobs/{job['id']}/result", headers=headers).json()
+    assert [(month["month"], month["total_compras"], month["purchases_count"]) for month in result["months"]] == [
+        ("2024-01", 100.0, 1), ("2024-02", 0.0, 0), ("2024-03", 75.0, 2)
+    ]
+    assert result["total_compras"] == 175.0
+    assert result["purchases_count"] == 3
+
+def test_shutdown_returns_running_jobs_to_pending(client, make_user, monkeypatch):
+    user_id, _ = make_user()
+    monkeypatch.setattr(jobs, "_stopping", threading.Event())
+    monkeypatch.setattr(jobs, "_executor", None)
+    with SessionLocal() as db:
+        job = ReportJob(kind="range", params="{}", total=3, progress=2, user_id=user_id, status=JobStatusEnum.running)
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    monkeypatch.setattr(jobs, "_running", {job_id})
+
+    jobs.shutdown_jobs()
+
+    with SessionLocal() as db:
+        job = db.get(ReportJob, job_id)
+        assert (job.status, job.progress) == (JobStatusEnum.pending, 0)
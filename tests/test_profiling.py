@@ -0,0 +1,39 @@
+# tests/test_profiling.py
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+
+@pytest.fixture
+def profiled_client(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", "segredo")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    app.add_middleware(profiling.ProfilingMiddleware)
+    with TestClient(app) as client:
+        yield client
+
+def test_header_token_profiles_and_stores_the_request(profiled_client, tmp_path):
+    response = profiled_client.get("/ping", headers={"X-Profile-Token": "segredo"})
+
+    profile_id = response.headers["X-Profile-Id"]
+    assert os.path.exists(tmp_path / f"{profile_id}.json")
+
+def test_query_string_token_is_ignored(profiled_client, tmp_path):
+    response = profiled_client.get("/ping", params={"profile_token": "segredo"})
+
+    assert "X-Profile-Id" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+def test_wrong_token_is_ignored(profiled_client):
+    response = profiled_client.get("/ping", headers={"X-Profile-Token": "outro"})
+
+    assert "X-Profile-Id" not in response.headers
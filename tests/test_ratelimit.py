@@ -0,0 +1,29 @@
+# tests/test_ratelimit.py
+import pytest
+
+from app import ratelimit
+
+class Incomplete(ratelimit.RateLimitBackend):
+    """Backend que esqueceu de implementar hit()"""
+
+class NotABackend:
+    def hit(self, key, rate, burst):
+        return 0
+
+def test_backend_without_hit_fails_on_load(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_BACKEND", f"{__name__}:Incomplete")
+
+    with pytest.raises(TypeError):
+        ratelimit.load_backend()
+
+def test_class_outside_the_interface_fails_on_load(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_BACKEND", f"{__name__}:NotABackend")
+
+    with pytest.raises(TypeError):
+        ratelimit.load_backend()
+
+def test_in_memory_bucket_refuses_after_burst():
+    backend = ratelimit.InMemoryBackend()
+
+    assert [backend.hit("k", rate=1, burst=2) for _ in range(2)] == [0, 0]
+    assert backend.hit("k", rate=1, burst=2) > 0
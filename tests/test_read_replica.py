@@ -0,0 +1,90 @@
+# tests/test_read_replica.py
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, update
+
+from app import config, database
+from app.database import Base, SessionLocal
+from app.models import Tire, User
+
+@pytest.fixture
+def checkouts(engine):
+    """Maior número de conexões do primário em uso ao mesmo tempo"""
+    state = {"current": 0, "max": 0}
+
+    def on_checkout(*args):
+        state["current"] += 1
+        state["max"] = max(state["max"], state["current"])
+
+    def on_checkin(*args):
+        state["current"] -= 1
+
+    event.listen(engine.pool, "checkout", on_checkout)
+    event.listen(engine.pool, "checkin", on_checkin)
+    yield state
+    event.remove(engine.pool, "checkout", on_checkout)
+    event.remove(engine.pool, "checkin", on_checkin)
+
+def use_replica(monkeypatch, url):
+    monkeypatch.setattr(config, "DATABASE_REPLICA_URL", url)
+    monkeypatch.setattr(database, "_replica_engine", None)
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    return database.get_replica_engine()
+
+@pytest.fixture
+def replica(client, monkeypatch, tmp_path):
+    """Réplica SQLite separada (vazia), para saber de onde a leitura veio"""
+    engine = use_replica(monkeypatch, f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def replica_tire(replica, user_id):
+    with replica.begin() as conn:
+        conn.execute(insert(Tire.__table__).values(
+            id=str(uuid.uuid4()), user_id=user_id, marca="Da Réplica",
+            medida="175/70", aro="R13", condicao="seminovo", vendido=False
+        ))
+
+def set_last_write(user_id, last_write_at):
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user_id).values(last_write_at=last_write_at))
+        db.commit()
+
+def brands(response):
+    assert response.status_code == 200, response.text
+    return {tire["marca"] for tire in response.json()}
+
+def test_without_replica_reads_share_the_primary_session(client, make_user, purchase, checkouts):
+    _, headers = make_user()
+    purchase(headers)
+    checkouts["max"] = 0
+
+    assert brands(client.get("/tires/", headers=headers)) == {"Pirelli"}
+    assert checkouts["max"] == 1
+
+def test_reads_go_to_the_replica(client, make_user, purchase, replica):
+    user_id, headers = make_user()
+    purchase(headers)
+    replica_tire(replica, user_id)
+    set_last_write(user_id, datetime.utcnow() - timedelta(minutes=5))
+
+    assert brands(client.get("/tires/", headers=headers)) == {"Da Réplica"}
+
+def test_recent_write_reads_from_the_primary(client, make_user, purchase, replica):
+    user_id, headers = make_user()
+    replica_tire(replica, user_id)
+    purchase(headers)  # Publica o evento, que marca last_write_at
+
+    assert brands(client.get("/tires/", headers=headers)) == {"Pirelli"}
+
+def test_unreachable_replica_falls_back_to_the_primary(client, make_user, purchase, monkeypatch, tmp_path):
+    use_replica(monkeypatch, f"sqlite:///{tmp_path}/nao-existe/replica.db")
+    user_id, headers = make_user()
+    purchase(headers)
+    set_last_write(user_id, None)
+
+    assert brands(client.get("/tires/", headers=headers)) == {"Pirelli"}
+    assert database._replica_down_until > 0
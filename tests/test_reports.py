@@ -0,0 +1,96 @@
+# tests/test_reports.py
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from app.database import SessionLocal
+from app.models import Purchase
+from app.routers.reports import bucket_expr, previous_year_period, week_label
+
+# Datas em volta de viradas de ano, onde o ano ISO difere do calendário
+DATES = ["2020-12-31", "2021-01-03", "2021-01-04", "2024-12-29", "2024-12-30", "2025-01-01", "2026-10-19"]
+
+@pytest.mark.parametrize("day", DATES)
+def test_week_bucket_matches_iso_calendar(client, day):
+    with SessionLocal() as db:
+        monday = db.execute(select(bucket_expr(db, datetime.fromisoformat(f"{day} 15:30:00"), "week"))).scalar()
+
+    iso = date.fromisoformat(day).isocalendar()
+    assert date.fromisoformat(monday).isoweekday() == 1
+    assert week_label(monday) == f"{iso.year}-W{iso.week:02d}"
+
+def test_yoy_periods_align_with_the_previous_year():
+    # Semana 10 de 2024 (começa em 04/03) corresponde à semana 10 de 2023
+    assert week_label(previous_year_period("2024-03-04", "week")) == "2023-W10"
+    assert previous_year_period("2024-05", "month") == "2023-05"
+    assert previous_year_period("2024-02-29", "day") == "2023-02-28"
+
+def set_purchase_dates(user_id, *dates):
+    """Datas das compras do usuário, na ordem crescente de valor"""
+    with SessionLocal() as db:
+        ids = db.execute(select(Purchase.id).where(Purchase.user_id == user_id).order_by(Purchase.valor)).scalars().all()
+        for purchase_id, day in zip(ids, dates):
+            db.execute(update(Purchase).where(Purchase.id == purchase_id).values(data=day))
+        db.commit()
+
+def range_report(client, headers, **params):
+    response = client.get("/reports/range", params={"yoy": "true", **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["buckets"]
+
+def test_yoy_by_day_only_returns_real_dates_of_the_range(client, make_user, purchase):
+    user_id, headers = make_user()
+    purchase(headers)
+    set_purchase_dates(user_id, datetime(2024, 2, 29, 10))
+
+    assert range_report(client, headers, start="2025-02", end="2025-02", group="day") == []
+
+def test_yoy_by_week_stays_inside_the_range(client, make_user, purchase):
+    user_id, headers = make_user()
+    purchase(headers, valor=30.0)
+    purchase(headers, valor=70.0)
+    # 01/01/2023 é domingo (semana 2022-W52); 05/01/2023 cai na semana 1
+    set_purchase_dates(user_id, datetime(2023, 1, 1, 10), datetime(2023, 1, 5, 10))
+
+    buckets = range_report(client, headers, start="2024-01", end="2024-01", group="week")
+
+    assert [bucket["period"] for bucket in buckets] == ["2024-W01"]
+    assert buckets[0]["total_compras"] == 0
+    assert buckets[0]["anterior"]["total_compras"] == 70.0
+
+def test_yoy_rejects_start_year_without_previous_year(client, make_user):
+    _, headers = make_user()
+
+    response = client.get("/reports/range", params={"start": "0001-01", "end": "0001-02", "yoy": "true"}, headers=headers)
+
+    assert response.status_code == 400
+
+def test_range_report_groups_by_iso_week(client, make_user, purchase):
+    user_id, headers = make_user()
+    purchase(headers, valor=100.0)
+    purchase(headers, valor=50.0)
+    with SessionLocal() as db:
+        db.execute(update(Purchase).where(Purchase.user_id == user_id).values(data=datetime(2021, 1, 2, 10)))
+        db.commit()
+
+    response = client.get("/reports/range", params={"start": "2021-01", "end": "2021-01", "group": "week"}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    buckets = response.json()["buckets"]
+    assert [bucket["period"] for bucket in buckets] == ["2020-W53"]
+    assert buckets[0]["total_compras"] == 150.0
+
+@pytest.mark.parametrize("month", ["0000-01", "9999-12", "10000-01"])
+def test_monthly_report_rejects_years_out_of_range(client, make_user, month):
+    _, headers = make_user()
+
+    response = client.get(f"/reports/monthly/{month}", headers=headers)
+
+    assert response.status_code == 400
+
+def test_monthly_report_accepts_year_bounds(client, make_user):
+    _, headers = make_user()
+
+    assert client.get("/reports/monthly/0001-01", headers=headers).status_code == 200
+    assert client.get("/reports/monthly/9998-12", headers=headers).status_code == 200
@@ -0,0 +1,74 @@
+# tests/test_tenancy.py
+import pytest
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.models import Purchase, Tire, TireConditionEnum, User
+from app.tenancy import scope
+
+@pytest.fixture
+def two_tenants(make_user, purchase):
+    """Dois usuários, cada um com uma compra (e o pneu dela)"""
+    ana, ana_headers = make_user()
+    bruno, bruno_headers = make_user()
+    purchase(ana_headers, marca="Pirelli")
+    purchase(bruno_headers, marca="Michelin")
+    return (ana, ana_headers), (bruno, bruno_headers)
+
+@pytest.fixture
+def statements(engine):
+    """SQL executado no primário enquanto o teste roda"""
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+def test_routes_never_return_other_tenants_rows(client, two_tenants):
+    (_, ana_headers), (_, bruno_headers) = two_tenants
+    bruno_tire = client.get("/tires/", headers=bruno_headers).json()[0]
+
+    assert [tire["marca"] for tire in client.get("/tires/", headers=ana_headers).json()] == ["Pirelli"]
+    assert [row["marca"] for row in client.get("/purchases/", headers=ana_headers).json()] == ["Pirelli"]
+    assert client.get(f"/tires/{bruno_tire['id']}", headers=ana_headers).status_code == 404
+
+def test_scoped_queries_without_filters_see_only_the_tenant(client, two_tenants):
+    (ana, _), (bruno, _) = two_tenants
+
+    with scope(SessionLocal(), ana) as db:
+        assert {tire.user_id for tire in db.query(Tire).all()} == {ana}
+        assert {row.user_id for row in db.query(Purchase).all()} == {ana}
+        # Carga de relacionamento também recebe o critério do tenant
+        other = db.get(User, bruno)
+        assert other.tires == []
+        assert other.purchases == []
+
+def test_scoped_session_cannot_write_for_another_tenant(client, two_tenants):
+    (ana, _), (bruno, _) = two_tenants
+
+    with scope(SessionLocal(), ana) as db:
+        db.add(Tire(user_id=bruno, marca="Pirelli", medida="205/55", aro="R16", condicao=TireConditionEnum.novo))
+        with pytest.raises(PermissionError):
+            db.flush()
+
+def test_new_rows_inherit_the_tenant(client, two_tenants):
+    (ana, _), _ = two_tenants
+
+    with scope(SessionLocal(), ana) as db:
+        tire = Tire(marca="Pirelli", medida="205/55", aro="R16", condicao=TireConditionEnum.novo)
+        db.add(tire)
+        db.flush()
+        assert tire.user_id == ana
+        db.rollback()
+
+def test_scope_adds_no_extra_queries(client, two_tenants, statements):
+    (ana, _), _ = two_tenants
+
+    with scope(SessionLocal(), ana) as db:
+        db.query(Tire).filter(Tire.vendido == False).all()
+
+    assert len(statements) == 1
+    assert "user_id" in statements[0]
@@ -0,0 +1,50 @@
+# tests/test_tires_bulk.py
+import pytest
+
+def stock(client, headers):
+    return client.get("/tires/", headers=headers).json()
+
+@pytest.mark.parametrize("selection", [
+    {"filter": {}},
+    {"filter": {"marca": "todas", "medida": "TODAS"}},
+    {"ids": [], "filter": {"marca": "Todas"}},
+])
+def test_bulk_delete_rejects_filter_without_criteria(client, make_user, purchase, selection):
+    _, headers = make_user()
+    purchase(headers)
+
+    response = client.request("DELETE", "/tires/bulk", json=selection, headers=headers)
+
+    assert response.status_code == 400
+    assert len(stock(client, headers)) == 1
+
+def test_bulk_delete_by_filter(client, make_user, purchase):
+    _, headers = make_user()
+    purchase(headers, marca="Pirelli")
+    purchase(headers, marca="Michelin")
+
+    response = client.request("DELETE", "/tires/bulk", json={"filter": {"marca": "pirelli"}}, headers=headers)
+
+    assert response.json() == {"affected": 1, "skipped_sold": 0}
+    assert [tire["marca"] for tire in stock(client, headers)] == ["Michelin"]
+
+@pytest.mark.parametrize("field", ["marca", "medida", "aro", "condicao"])
+def test_bulk_update_rejects_null_for_required_fields(client, make_user, purchase, field):
+    _, headers = make_user()
+    purchase(headers)
+    tire_id = stock(client, headers)[0]["id"]
+
+    response = client.patch("/tires/bulk", json={"ids": [tire_id], "changes": {field: None}}, headers=headers)
+
+    assert response.status_code == 400
+    assert field in response.json()["detail"]
+
+def test_bulk_update_clears_optional_field(client, make_user, purchase):
+    _, headers = make_user()
+    purchase(headers)
+    tire_id = stock(client, headers)[0]["id"]
+
+    response = client.patch("/tires/bulk", json={"ids": [tire_id], "changes": {"detalhes": None}}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["affected"] == 1